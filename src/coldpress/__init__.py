@@ -27,41 +27,60 @@ __version__ = "1.0.0-beta"
 __license__ = "GPLv3"
 __copyright__ = "Copyright 2025, Antonio Hernán Caballero"
 
-from .encode import encode_from_binned, encode_from_samples, binned_to_quantiles
-from .decode import decode_quantiles, quantiles_to_binned, decode_to_binned 
+from .encode import encode_from_binned, encode_from_samples, binned_to_quantiles, binned_to_quantiles_batch, samples_to_quantiles, samples_to_quantiles_batch
+from .decode import decode_quantiles, decode_quantiles_batch, quantiles_to_binned, decode_to_binned 
 from .stats import (
     measure_from_quantiles,
+    measure_from_quantiles_batch,
     zmode_from_quantiles,
+    zmode_from_quantiles_batch,
     zmedian_from_quantiles,
+    zmedian_from_quantiles_batch,
     zmean_from_quantiles,
+    zmean_from_quantiles_batch,
     zmean_err_from_quantiles,
+    zmean_err_from_quantiles_batch,
     zrandom_from_quantiles,
+    zrandom_from_quantiles_batch,
     odds_from_quantiles,
+    odds_from_quantiles_batch,
     HPDCI_from_quantiles,
+    HPDCI_from_quantiles_batch,
 )
 from .utils import step_pdf_from_quantiles, plot_from_quantiles
 
 __all__ = [
     'binned_to_quantiles',
+    'binned_to_quantiles_batch',
     'density_to_quantiles',
     'samples_to_quantiles',
+    'samples_to_quantiles_batch',
     'encode_quantiles',
     'encode_from_binned',
     'encode_from_density',
     'encode_from_samples',
     'decode_quantiles',
+    'decode_quantiles_batch',
     'decode_to_binned',
     'decode_to_density',
     'decode_to_samples',
     'quantiles_to_binned',    
     'measure_from_quantiles',
+    'measure_from_quantiles_batch',
     'zmode_from_quantiles',
+    'zmode_from_quantiles_batch',
     'zmedian_from_quantiles',
+    'zmedian_from_quantiles_batch',
     'zmean_from_quantiles',
+    'zmean_from_quantiles_batch',
     'zmean_err_from_quantiles',
+    'zmean_err_from_quantiles_batch',
     'zrandom_from_quantiles',
+    'zrandom_from_quantiles_batch',
     'odds_from_quantiles',
+    'odds_from_quantiles_batch',
     'HPDCI_from_quantiles',
+    'HPDCI_from_quantiles_batch',
     'step_pdf_from_quantiles',
     'plot_from_quantiles'
 ]
\ No newline at end of file
@@ -3,14 +3,17 @@
 
 import argparse
 import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 from astropy.io import fits
+from astropy.table import Table
 
 from . import __version__
 from .encode import encode_from_binned, encode_from_density, encode_from_samples
-from .decode import decode_to_binned, decode_quantiles
-from .stats import measure_from_quantiles, ALL_QUANTITIES, QUANTITY_DESCRIPTIONS
+from .decode import decode_to_binned, decode_quantiles_batch
+from .stats import measure_from_quantiles_batch, ALL_QUANTITIES, QUANTITY_DESCRIPTIONS
 from .utils import plot_from_quantiles
 
 # --- Constants for Default Column Names ---
@@ -67,6 +70,92 @@ def info_logic(args):
         sys.exit(1)
 
 
+def _cpu_time():
+    """Returns the CPU seconds used by this process and its finished child processes."""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def _run_in_parallel(func, rows, jobs, *args, **kwargs):
+    """Runs a row-wise function on chunks of rows in parallel processes.
+
+    The rows of the input are split into one chunk per job, each chunk is
+    processed in a separate process, and the results are joined back in the
+    original order. The result is identical to processing all rows at once.
+
+    Args:
+        func (callable): The function to run (e.g. `encode_from_binned`),
+            taking the 2D array of rows as first argument and returning
+            one result per row.
+        rows (np.ndarray): A 2D array with the input rows (e.g. one PDF per row).
+        jobs (int): Number of parallel processes. Values below 1 use all
+            available cores.
+        *args: Additional positional arguments for `func`.
+        **kwargs: Additional keyword arguments for `func`.
+
+    Returns:
+        np.ndarray: The results for all the rows.
+    """
+    if jobs < 1:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(rows))
+    if jobs <= 1:
+        return func(rows, *args, **kwargs)
+
+    chunks = np.array_split(np.asarray(rows), jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(func, chunk, *args, **kwargs) for chunk in chunks]
+        return np.concatenate([future.result() for future in futures])
+
+# keywords that describe the layout of a binary table, which are regenerated for the output table
+_TABLE_KEYWORD = re.compile(r'(XTENSION|BITPIX|NAXIS\d*|PCOUNT|GCOUNT|TFIELDS|THEAP|T[A-Z]+\d+)$')
+
+def _read_table(filename):
+    """Reads the table in HDU 1 of a FITS file, memory-mapped.
+
+    Args:
+        filename (str): Path to the FITS file.
+
+    Returns:
+        tuple[astropy.table.Table, astropy.io.fits.Header]: The table and
+            the header of its HDU, which keeps the comments of the cards.
+    """
+    return Table.read(filename, hdu=1, memmap=True), fits.getheader(filename, 1)
+
+def _write_table(table, header, filename, history):
+    """Writes a table to a new FITS file, keeping the cards of the input header.
+
+    The table is converted directly to a table HDU. The column keywords
+    are regenerated, keeping the comments of the input TTYPEn cards, and
+    vector columns get no TDIMn cards, as with `fits.BinTableHDU`. Every
+    other card is copied from the input header with its comment, and
+    `history` is added to the HISTORY.
+
+    Args:
+        table (astropy.table.Table): The table to write.
+        header (astropy.io.fits.Header): The header of the input table HDU.
+        filename (str): Path for the output FITS file.
+        history (str): The HISTORY entry describing the new columns.
+    """
+    hdu = fits.table_to_hdu(table)
+    for col in hdu.columns:
+        if table[col.name].ndim == 2:
+            col.dim = None
+
+    ttype_comments = {header[f'TTYPE{n}']: header.comments[f'TTYPE{n}'] for n in range(1, header.get('TFIELDS', 0)+1)}
+    for n, col in enumerate(hdu.columns, start=1):
+        if ttype_comments.get(col.name):
+            hdu.header.comments[f'TTYPE{n}'] = ttype_comments[col.name]
+
+    # the cards rebuilt from table.meta have lost their comments, so they are replaced by the input cards
+    for i in reversed(range(len(hdu.header))):
+        if not _TABLE_KEYWORD.match(hdu.header.cards[i].keyword):
+            del hdu.header[i]
+    hdu.header.extend([card for card in header.cards if not _TABLE_KEYWORD.match(card.keyword)])
+    hdu.header.add_history(history)
+
+    # the table is built from the verified input HDU, so verifying it again on output is skipped
+    hdu.writeto(filename, overwrite=True, output_verify='ignore', checksum=False)
+
 # --- Logic for the 'encode' command ---
 def encode_logic(args):
     """Encodes redshift PDFs into the ColdPress format.
@@ -91,6 +180,8 @@ def encode_logic(args):
             - tolerance (float): Tolerance for validation.
             - keep_orig (bool): Whether to keep the original PDF column.
             - clip_fraction (float): Fraction of samples to be clipped out at the extremes of the redshift range.
+            - jobs (int): Number of parallel encoding processes (-1 for all cores).
+            - chunk_size (int): Number of rows read and encoded at a time.
     """
     if args.length % 4 != 0:
         print(f"Error: Packet length (--length) must be a multiple of 4, but got {args.length}.", file=sys.stderr)
@@ -98,59 +189,63 @@ def encode_logic(args):
 
     print(f"Opening input file: {args.input}")
 
-    with fits.open(args.input) as h:
-        header = h[1].header
-        orig_cols = list(h[1].columns)
-        
-        if args.samples is not None:
-            orig_column = args.samples
-            history = f'PDFs from samples in column {args.samples} cold-pressed as {args.out_encoded}'
-            print(f"Generating quantiles from random redshift samples and compressing into {args.length}-byte packets...")
-            if (args.zmin is not None) and (args.zmax) is not None:
-                clip_range = [args.zmin, args.zmax]
-            else:
-                clip_range = None    
-            samples = h[1].data[args.samples]
-            coldpress_PDF = encode_from_samples(samples, packetsize=args.length, ini_quantiles=args.length-8, 
-                                                validate=args.validate, tolerance=args.tolerance, clip_fraction=args.clip_fraction, 
-                                                clip_range=clip_range) 
-        elif args.binned is not None:
-            orig_column = args.binned
-            history = f'Binned PDFs in column {args.binned} cold-pressed as {args.out_encoded}'
-            PDF = h[1].data[args.binned]
-            zvector = np.linspace(args.zmin, args.zmax, PDF.shape[1])
-            cratio = PDF.shape[1]*PDF.itemsize/args.length
-            print(f"Compressing binned PDFs into {args.length}-byte packets (compression ratio: {cratio:.2f})...")
-            coldpress_PDF = encode_from_binned(PDF, zvector, packetsize=args.length, ini_quantiles=args.length-8, 
-                                                validate=args.validate, tolerance=args.tolerance)
-        elif args.density is not None:
-            orig_column = args.density
-            history = f'Probability density in column {args.density} cold-pressed as {args.out_encoded}'
-            PDF = h[1].data[args.density]
-            zvector = np.linspace(args.zmin, args.zmax, PDF.shape[1])
-            cratio = PDF.shape[1]*PDF.itemsize/args.length
-            print(f"Compressing density PDFs into {args.length}-byte packets (compression ratio: {cratio:.2f})...")
-            coldpress_PDF = encode_from_density(PDF, zvector, packetsize=args.length, ini_quantiles=args.length-8, 
-                                                validate=args.validate, tolerance=args.tolerance)
-            
-                                                                                               
-        nints = args.length // 4
-        new_col = fits.Column(name=args.out_encoded, format=f'{nints}J', array=coldpress_PDF)
-
-        final_cols = [c for c in orig_cols if c.name != args.out_encoded]
-              
-        if args.keep_orig:
-            print(f"Including column '{orig_column}' in output FITS table.")
+    table, header = _read_table(args.input)
+    Nsources = len(table)
+    
+    if args.samples is not None:
+        orig_column = args.samples
+        history = f'PDFs from samples in column {args.samples} cold-pressed as {args.out_encoded}'
+        print(f"Generating quantiles from random redshift samples and compressing into {args.length}-byte packets...")
+        if (args.zmin is not None) and (args.zmax) is not None:
+            clip_range = [args.zmin, args.zmax]
         else:
-            final_cols = [c for c in final_cols if c.name != orig_column]
-            print(f"Excluding column '{orig_column}' from output FITS table.")
+            clip_range = None    
+        PDF = table[args.samples]
+        encoder, encoder_args = encode_from_samples, ()
+        encoder_kwargs = dict(clip_fraction=args.clip_fraction, clip_range=clip_range)
+    elif args.binned is not None:
+        orig_column = args.binned
+        history = f'Binned PDFs in column {args.binned} cold-pressed as {args.out_encoded}'
+        PDF = table[args.binned]
+        zvector = np.linspace(args.zmin, args.zmax, PDF.shape[1])
+        cratio = PDF.shape[1]*PDF.itemsize/args.length
+        print(f"Compressing binned PDFs into {args.length}-byte packets (compression ratio: {cratio:.2f})...")
+        encoder, encoder_args, encoder_kwargs = encode_from_binned, (zvector,), {}
+    elif args.density is not None:
+        orig_column = args.density
+        history = f'Probability density in column {args.density} cold-pressed as {args.out_encoded}'
+        PDF = table[args.density]
+        zvector = np.linspace(args.zmin, args.zmax, PDF.shape[1])
+        cratio = PDF.shape[1]*PDF.itemsize/args.length
+        print(f"Compressing density PDFs into {args.length}-byte packets (compression ratio: {cratio:.2f})...")
+        encoder, encoder_args, encoder_kwargs = encode_from_density, (zvector,), {}
+                                                                                           
+    # the PDFs are read and encoded in chunks of rows to bound memory usage
+    coldpress_PDF = np.zeros((Nsources, args.length // 4), dtype='>i4')
+    cpu_start = _cpu_time()
+    for start in range(0, Nsources, args.chunk_size):
+        stop = min(start+args.chunk_size, Nsources)
+        coldpress_PDF[start:stop] = _run_in_parallel(encoder, np.asarray(PDF[start:stop]), args.jobs, *encoder_args,
+                                                        packetsize=args.length, ini_quantiles=args.length-8,
+                                                        validate=args.validate, tolerance=args.tolerance, **encoder_kwargs)
+    # the count and the CPU time are reported once for all the chunks and worker processes (empty packets are invalid PDFs)
+    NPDFs = np.count_nonzero(coldpress_PDF.any(axis=1))
+    print(f"{NPDFs} PDFs cold-pressed in {_cpu_time()-cpu_start:.6f} CPU seconds")
+
+    # the encoded column is added to the input table as read, without rebuilding the other columns
+    # (a dropped input column is never copied, only read in chunks from the memory-mapped file)
+    if args.out_encoded in table.colnames:
+        table.remove_column(args.out_encoded)
+    if args.keep_orig:
+        print(f"Including column '{orig_column}' in output FITS table.")
+    else:
+        if orig_column in table.colnames:
+            table.remove_column(orig_column)
+        print(f"Excluding column '{orig_column}' from output FITS table.")
+    table.add_column(coldpress_PDF, name=args.out_encoded, copy=False)
 
-        final_cols.append(new_col)
-        new_hdu = fits.BinTableHDU.from_columns(final_cols, header=header)
-
-    new_hdu.header.add_history(history)
     print(f"Writing compressed data to: {args.output}")
-    new_hdu.writeto(args.output, overwrite=True)
+    _write_table(table, header, args.output, history)
     print('Done.')
 
 
@@ -174,36 +269,62 @@ def decode_logic(args):
             - zstep (float): Step size for the output redshift grid.
             - force_range (bool): If True, truncates PDFs outside the grid.
             - method (str): Interpolation method ('linear' or 'spline').
+            - chunk_size (int): Number of rows read and decoded at a time.
     """
     
     print(f"Opening input file: {args.input}")
 
-    with fits.open(args.input) as h:
-        header = h[1].header
-        coldpress_PDF = h[1].data[args.encoded]
-        orig_cols = list(h[1].columns)
+    table, header = _read_table(args.input)
+    coldpress_PDF = table[args.encoded]
+    Nsources = len(table)
 
-        zvector = np.arange(args.zmin, args.zmax + args.zstep/2, args.zstep)
-        zvsize = len(zvector)
+    # the bins are exactly zstep apart; their number is rounded, so that float error never adds or drops the last bin
+    Nbins = int(np.floor((args.zmax-args.zmin)/args.zstep + 0.5)) + 1
+    zvector = args.zmin + args.zstep*np.arange(Nbins)
+    zvsize = len(zvector)
 
-        print(f"Decompressing PDFs using {args.method} interpolation of the quantiles...")
-        try:
-            decoded_PDF = decode_to_binned(coldpress_PDF, zvector, force_range=args.force_range, method=args.method)
-        except ValueError as e:
-            print(f"Error: {e}", file=sys.stderr)
-            print("Hint: Use the --force-range flag to proceed with truncation at your own risk.", file=sys.stderr)
-            sys.exit(1)
+    # the packets are read and decoded in chunks of rows to bound memory usage
+    print(f"Decompressing PDFs using {args.method} interpolation of the quantiles...")
+    decoded_PDF = np.zeros((Nsources, zvsize), dtype=np.float32)
+    try:
+        for start in range(0, Nsources, args.chunk_size):
+            stop = min(start+args.chunk_size, Nsources)
+            decoded_PDF[start:stop] = decode_to_binned(np.asarray(coldpress_PDF[start:stop]), zvector, force_range=args.force_range, method=args.method, first_index=start)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        print("Hint: Use the --force-range flag to proceed with truncation at your own risk.", file=sys.stderr)
+        sys.exit(1)
+
+    # the decoded column is added to the input table as read, without rebuilding the other columns
+    if args.out_binned in table.colnames:
+        table.remove_column(args.out_binned)
+    table.add_column(decoded_PDF, name=args.out_binned, copy=False)
 
-        new_col = fits.Column(name=args.out_binned, format=f'{zvsize}E', array=decoded_PDF)
-        final_cols = [c for c in orig_cols if c.name != args.out_binned]
-        final_cols.append(new_col)
-        new_hdu = fits.BinTableHDU.from_columns(final_cols, header=header)
-    
-    new_hdu.header.add_history(f'PDFs in column {args.encoded} extracted as {args.out_binned}')
     print(f"Writing decompressed data to: {args.output}")
-    new_hdu.writeto(args.output, overwrite=True)
+    _write_table(table, header, args.output, f'PDFs in column {args.encoded} extracted as {args.out_binned}')
     print('Done.')
 
+def _measure_packets(packets, dtype, odds_window=0.03):
+    """Decodes packets and measures their point estimates.
+
+    Args:
+        packets (np.ndarray): A 2D array of encoded packets, one per row.
+        dtype (np.dtype): Structured dtype with one field per quantity to measure.
+        odds_window (float, optional): Half-width for the odds calculation.
+
+    Returns:
+        np.ndarray: A structured array with the point estimates of each packet.
+    """
+    results = measure_from_quantiles_batch(
+        decode_quantiles_batch(packets),
+        quantities_to_measure=list(dtype.names),
+        odds_window=odds_window
+    )
+    out = np.empty(len(packets), dtype=dtype)
+    for q_name, values in results.items():
+        out[q_name] = values
+    return out
+
 # --- Logic for the 'measure' command ---
 def measure_logic(args):
     """Computes point-estimate statistics from compressed PDFs.
@@ -222,16 +343,15 @@ def measure_logic(args):
               quantities to measure (e.g., ['Z_MEAN', 'Z_MODE']). 'ALL'
               computes all available quantities.
             - odds_window (float): Half-width for the odds calculation.
+            - jobs (int): Number of parallel measuring processes (-1 for all cores).
+            - chunk_size (int): Number of rows read and measured at a time.
     """
 
     print(f"Opening input file: {args.input}")
-    with fits.open(args.input) as h:
-        data = h[1].data
-        header = h[1].header
-        original_columns = data.columns
 
-    qcold = data[args.encoded]
-    Nsources = qcold.shape[0]
+    table, header = _read_table(args.input)
+    qcold = table[args.encoded]
+    Nsources = len(table)
     
     q_to_compute = {q.upper() for q in args.quantities}
     if 'ALL' in q_to_compute:
@@ -239,40 +359,42 @@ def measure_logic(args):
     
     print(f"Will compute: {', '.join(sorted(list(q_to_compute)))}")
 
-    d = {}
-    for q_name in q_to_compute:
-         d[q_name] = np.full(Nsources, np.nan, dtype=np.float32)
+    # one record per source holds all the point estimates
+    d = np.full(Nsources, np.nan, dtype=[(q_name, np.float32) for q_name in sorted(q_to_compute)])
 
-    valid = np.any(qcold != 0, axis=1)
-    valid_indices = np.where(valid)[0]
-    print(f"Calculating point estimates for {len(valid_indices)} valid sources...")
+    print(f"Calculating point estimates for {Nsources} sources...")
     
-    for i in valid_indices:
-        quantiles = decode_quantiles(qcold[i].tobytes())
-        results = measure_from_quantiles(
-            quantiles,
-            quantities_to_measure=list(q_to_compute),
-            odds_window=args.odds_window
-        )
-        for q_name, value in results.items():
-            d[q_name][i] = value
-
-    final_cols = []
-    for col in original_columns:
-        if col.name not in q_to_compute:
-            final_cols.append(col)
-
-    for name, array in d.items():
-        format_str = 'E' if array.dtype == np.float32 else 'I'
-        final_cols.append(fits.Column(name=name, format=format_str, array=array))
-
-    new_hdu = fits.BinTableHDU.from_columns(final_cols, header=header)
-    new_hdu.header['HISTORY'] = f'Computed point estimates from column: {args.encoded}'
+    # read, decode and measure the sources in chunks of rows to bound memory usage
+    for start in range(0, Nsources, args.chunk_size):
+        chunk = np.asarray(qcold[start:start+args.chunk_size])
+        valid = np.any(chunk != 0, axis=1)
+        rows = start + np.flatnonzero(valid)
+        if len(rows) == 0:
+            continue
+        d[rows] = _run_in_parallel(_measure_packets, chunk[valid], args.jobs, d.dtype, odds_window=args.odds_window)
+
+    # the new columns are added to the input table as read, without rebuilding the other columns
+    # FITS column names are case-insensitive, so existing columns are replaced regardless of their case
+    table.remove_columns([name for name in table.colnames if name.upper() in q_to_compute])
+    table.add_columns([d[name] for name in d.dtype.names], names=d.dtype.names, copy=False)
+
     print(f"Writing point estimates to: {args.output}")
-    new_hdu.writeto(args.output, overwrite=True)
+    _write_table(table, header, args.output, f'Computed point estimates from column: {args.encoded}')
     print('Done.')
 
 
+def _plot_one(task):
+    """Plots one PDF, as a picklable task for a process pool.
+
+    Args:
+        task (dict): Keyword arguments for `plot_from_quantiles`.
+
+    Returns:
+        str or None: The name of the saved plot file.
+    """
+    plot_from_quantiles(**task)
+    return task['output_filename']
+
 # --- Logic for the 'plot' command ---
 def plot_logic(args):
     """Generates plots of PDFs from compressed data.
@@ -297,6 +419,7 @@ def plot_logic(args):
               ('linear' or 'spline').
             - quantities (list, optional): List of FITS columns to
               overplot as vertical lines.
+            - jobs (int): Number of parallel plotting processes (-1 for all cores).
     """
     print(f"Opening input file: {args.input}")
     with fits.open(args.input) as h:
@@ -308,11 +431,15 @@ def plot_logic(args):
         data = h[1].data
 
     qcold = data[args.encoded]
+    has_data = np.any(qcold != 0, axis=1)
+
+    # column names are resolved with set/dict lookups (the first match wins for case-insensitive names)
+    column_names = set(data.columns.names)
+    column_by_upper = {c.upper(): c for c in reversed(data.columns.names)}
 
     if args.quantities:
-        all_cols_upper = {c.upper() for c in data.columns.names}
         for q_col in args.quantities:
-            if q_col.upper() not in all_cols_upper:
+            if q_col.upper() not in column_by_upper:
                 print(f"Error: Quantity column '{q_col}' not found in FITS table.", file=sys.stderr)
                 sys.exit(1)
 
@@ -325,14 +452,22 @@ def plot_logic(args):
             print(f"Warning: Requested first {args.first} PDFs, but file only contains {len(data)}. Plotting all sources.")
         indices_to_plot = range(num_to_plot)
     else:  # This handles the 'id' case, which is the default if not the others
-        if args.idcol not in data.columns.names:
+        if args.idcol not in column_names:
             print(f"Error: --id specified, but no '{args.idcol}' column found in {args.input}", file=sys.stderr)
             sys.exit(1)
         
         source_ids = list(args.id)
-        id_column_as_str = data[args.idcol].astype(str)
-        source_ids_as_str = np.asarray(source_ids, dtype=str)
-        indices_to_plot = np.where(np.isin(id_column_as_str, source_ids_as_str))[0]
+        id_column = data[args.idcol]
+        if np.issubdtype(id_column.dtype, np.integer):
+            # integer IDs are compared as numbers, without converting the column to strings
+            # (IDs outside the range of the column type cannot match any source)
+            info = np.iinfo(id_column.dtype)
+            wanted = [int(s) for s in source_ids if s.lstrip('+-').isdigit() and str(int(s)) == s]
+            wanted = [i for i in wanted if info.min <= i <= info.max]
+            indices_to_plot = np.flatnonzero(np.isin(id_column, np.asarray(wanted, dtype=id_column.dtype)))
+        else:
+            wanted = set(source_ids)
+            indices_to_plot = np.fromiter((i for i, v in enumerate(id_column.astype(str)) if v in wanted), dtype=np.int64)
 
         if len(indices_to_plot) != len(source_ids):
             print("Warning: Some specified IDs were not found in the file.", file=sys.stderr)
@@ -342,41 +477,60 @@ def plot_logic(args):
     if not args.interactive:
         os.makedirs(args.outdir, exist_ok=True)
 
-    for i in indices_to_plot:
-        # Corrected logic for determining the source ID string
-        source_id_val = data[args.idcol][i] if args.idcol is not None and args.idcol in data.columns.names else f"row_{i}"
-        
-        if not np.any(qcold[i] != 0):
-            print(f"Skipping source {source_id_val}: No valid PDF data.")
-            continue
+    # fetch the ID and marker columns once, outside of the plotting loop
+    id_column = data[args.idcol] if args.idcol is not None and args.idcol in column_names else None
+    marker_columns = {}
+    if args.quantities:
+        for q_col in args.quantities:
+            actual_col_name = column_by_upper.get(q_col.upper())
+            if actual_col_name:
+                marker_columns[q_col] = data[actual_col_name]
 
-        quantiles = decode_quantiles(qcold[i].tobytes())
-        
-        markers_to_plot = {}
-        if args.quantities:
-            for q_col in args.quantities:
-                actual_col_name = next((c for c in data.columns.names if c.upper() == q_col.upper()), None)
-                if actual_col_name:
-                    markers_to_plot[q_col] = data[actual_col_name][i]
-
-        output_filename = None
-        if not args.interactive:
-            output_filename = os.path.join(args.outdir, f"pdf_{source_id_val}.{args.format.lower()}")
+    # output file names only differ in the source ID
+    filename_prefix = os.path.join(args.outdir, 'pdf_')
+    filename_ext = args.format.lower()
+
+    # plots are rendered in parallel processes, except in interactive mode
+    jobs = args.jobs if args.jobs >= 1 else (os.cpu_count() or 1)
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and not args.interactive else None
+
+    # the plotted packets are decoded in blocks with the batch decoder
+    indices_to_plot = np.asarray(indices_to_plot, dtype=np.int64)
+    block = 1024
+    try:
+        for start in range(0, len(indices_to_plot), block):
+            rows = indices_to_plot[start:start+block]
+            Q = decode_quantiles_batch(qcold[rows])
+            tasks = []
+            for i, q in zip(rows, Q):
+                source_id_val = id_column[i] if id_column is not None else f"row_{i}"
         
-        try:
-            plot_from_quantiles(
-                quantiles,
-                output_filename=output_filename,
-                interactive=args.interactive,
-                source_id=source_id_val,
-                method=args.method,
-                markers=markers_to_plot
-            )
-            if not args.interactive:
-                print(f"Saved plot to {output_filename}")
-        except ImportError as e:
-            print(e, file=sys.stderr)
-            sys.exit(1)
+                if not has_data[i]:
+                    print(f"Skipping source {source_id_val}: No valid PDF data.")
+                    continue
+
+                output_filename = None
+                if not args.interactive:
+                    output_filename = f"{filename_prefix}{source_id_val}.{filename_ext}"
+
+                tasks.append(dict(
+                    quantiles=q[~np.isnan(q)],
+                    output_filename=output_filename,
+                    interactive=args.interactive,
+                    source_id=source_id_val,
+                    method=args.method,
+                    markers={q_col: column[i] for q_col, column in marker_columns.items()}
+                ))
+
+            for output_filename in (pool.map(_plot_one, tasks, chunksize=64) if pool else map(_plot_one, tasks)):
+                if not args.interactive:
+                    print(f"Saved plot to {output_filename}")
+    except ImportError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if pool:
+            pool.shutdown()
 
 # --- Logic for the 'check' command ---
 def check_logic(args):
@@ -397,28 +551,45 @@ def check_logic(args):
             - truncation_threshold (float): Threshold for truncation detection.
             - list (bool): If True, list flagged source IDs to stdout.
             - idcol (str, optional): Column name of source IDs, required for --list.
+            - chunk_size (int): Number of rows read and checked at a time.
     """
     print(f"Opening input file: {args.input}")
-    with fits.open(args.input) as h:
-        data = h[1].data
-        header = h[1].header
-        original_columns = data.columns
-        if args.list:
-            ID = data[args.idcol]
-        
-        if args.binned is None:
-            samples = data[args.samples]
-            invalid = (np.sum(~np.isfinite(samples),axis=1) > 0)
-            v = ~invalid
-            unresolved = (np.max(samples[v],axis=1)-np.min(samples[v],axis=1) == 0)
-        else:
-            PDF = data[args.binned]
-            invalid = (np.sum(~np.isfinite(PDF),axis=1) > 0) | (np.nanmin(PDF,axis=1) < 0) | (np.nanmax(PDF,axis=1) == 0.)
-            v = ~invalid
-            unresolved = (np.sum(PDF[v],axis=1)-np.max(PDF[v],axis=1) == 0)
-            threshold = args.truncation_threshold * np.max(PDF[v],axis=1)
-            truncated = ((PDF[v,0] > threshold) | (PDF[v,-1] > threshold))
+    table, header = _read_table(args.input)
+    if args.list:
+        ID = table[args.idcol]
     
+    if args.binned is None:
+        samples = table[args.samples]
+        Nsources = samples.shape[0]
+    else:
+        PDF = table[args.binned]
+        Nsources = PDF.shape[0]
+    invalid = np.zeros(Nsources, dtype=bool)
+    unresolved = np.zeros(Nsources, dtype=bool)
+    truncated = np.zeros(Nsources, dtype=bool)
+
+    # per-row reductions are computed once and the flags are derived from them, in chunks of rows
+    # to bound memory usage (rows with non-finite values give NaN reductions, but they are flagged as invalid anyway)
+    with np.errstate(invalid='ignore'):
+        for start in range(0, Nsources, args.chunk_size):
+            rows = slice(start, start+args.chunk_size)
+            if args.binned is None:
+                chunk = np.asarray(samples[rows])
+                invalid[rows] = ~np.isfinite(chunk).all(axis=1)
+                unresolved[rows] = (chunk.max(axis=1)-chunk.min(axis=1) == 0)
+            else:
+                chunk = np.asarray(PDF[rows])
+                row_max = chunk.max(axis=1)
+                row_min = chunk.min(axis=1)
+                row_sum = chunk.sum(axis=1)
+                invalid[rows] = ~np.isfinite(chunk).all(axis=1) | (row_min < 0) | (row_max == 0.)
+                unresolved[rows] = (row_sum-row_max == 0)
+                threshold = args.truncation_threshold * row_max
+                truncated[rows] = (chunk[:,0] > threshold) | (chunk[:,-1] > threshold)
+    v = ~invalid
+    unresolved = unresolved[v]
+    truncated = truncated[v]
+
     if args.binned is None:
         print(f'Column {args.samples} contains {samples.shape[0]} sampled PDFs, each containing {samples.shape[1]} random redshift samples.')
     else:    
@@ -455,22 +626,15 @@ def check_logic(args):
             d['PDF_truncated'][v] = truncated
             d['Z_FLAGS'][d['PDF_truncated']] += 4
 
-        final_cols = []
+        # the new columns are added to the input table as read, without rebuilding the other columns
         new_col_names = d.keys()
-        for col in original_columns:
-            if col.name not in new_col_names:
-                final_cols.append(col)
-
+        new_names_upper = {name.upper() for name in new_col_names}
+        table.remove_columns([name for name in table.colnames if name.upper() in new_names_upper])
         for name, array in d.items():
-            if array.dtype == np.float32: format_str = 'E'
-            elif array.dtype == np.int16: format_str = 'I'
-            elif array.dtype == bool: format_str = 'L'    
-            final_cols.append(fits.Column(name=name, format=format_str, array=array))
+            table[name] = array
 
-        new_hdu = fits.BinTableHDU.from_columns(final_cols, header=header)
-        new_hdu.header['HISTORY'] = f'Added flags columns indicating issues in the PDFs: {list(new_col_names)}'
         print(f"Writing point estimates to: {args.output}")
-        new_hdu.writeto(args.output, overwrite=True)
+        _write_table(table, header, args.output, f'Added flags columns indicating issues in the PDFs: {list(new_col_names)}')
         print('Done.')
 
 # --- Main Entry Point and Parser Configuration ---
@@ -507,6 +671,8 @@ def main():
     parser_encode.add_argument('--tolerance', type=float, nargs='?', default=0.001, help='Maximum shift tolerated for the redshift of the quantiles.')
     parser_encode.add_argument('--keep-orig', action='store_true', help='Include the original input column with binned PDFs or samples in the output file.')
     parser_encode.add_argument('--clip-fraction', type=float, nargs='?', default=0, help='Fraction of samples to clip out at the extremes of the redshift range.')
+    parser_encode.add_argument('--jobs', type=int, default=-1, help='Number of parallel processes used for encoding (default: -1, all cores).')
+    parser_encode.add_argument('--chunk-size', type=int, default=100000, help='Number of rows read and encoded at a time (default: 100000).')
     parser_encode.set_defaults(func=encode_logic)
 
     # --- Parser for the "decode" command ---
@@ -520,6 +686,7 @@ def main():
     parser_decode.add_argument('--zstep', type=float, help='Width of the redshift bins.')
     parser_decode.add_argument('--force-range', action='store_true', help='Force binning to the range [zmin,zmax] even if PDFs are truncated.')
     parser_decode.add_argument('--method', type=str, nargs='?', default='linear', choices=['linear','spline'], help='Interpolation method for PDF reconstruction (default: linear).')
+    parser_decode.add_argument('--chunk-size', type=int, default=100000, help='Number of rows read and decoded at a time (default: 100000).')
     parser_decode.set_defaults(func=decode_logic)
 
     # --- Parser for the "measure" command ---
@@ -531,6 +698,8 @@ def main():
     parser_measure.add_argument('--quantities', type=str, nargs='+', default=['all'], choices=choices_list, metavar='QUANTITY', help='List of quantities to measure from the PDFs (default: all).')
     parser_measure.add_argument('--odds-window', type=float, default=0.03, help='Half-width of the integration window for odds calculation.')
     parser_measure.add_argument('--list-quantities', action='store_true', help='List all available quantities and their descriptions.')
+    parser_measure.add_argument('--jobs', type=int, default=-1, help='Number of parallel processes used for measuring (default: -1, all cores).')
+    parser_measure.add_argument('--chunk-size', type=int, default=100000, help='Number of rows read and measured at a time (default: 100000).')
                               
     parser_measure.set_defaults(func=measure_logic)
 
@@ -548,6 +717,7 @@ def main():
     parser_plot.add_argument('--format', type=str, default='png', help='Output format for plots.')
     parser_plot.add_argument('--method', type=str, default='all', choices=['steps', 'spline', 'all'], help='PDF reconstruction method for plots.')
     parser_plot.add_argument('--quantities', nargs='+', type=str, help='List of FITS columns to overplot as vertical lines.')
+    parser_plot.add_argument('--jobs', type=int, default=-1, help='Number of parallel processes used for plotting (default: -1, all cores).')
     parser_plot.set_defaults(func=plot_logic)
     
     # --- Parser for the "check" command ---
@@ -560,6 +730,7 @@ def main():
     parser_check.add_argument('--truncation-threshold', type=float, default=0.05, help='Threshold value for PDF truncation detection.')
     parser_check.add_argument('--list', action='store_true', help='List ID and flags of all flagged PDFs.')
     parser_check.add_argument('--idcol', type=str, help='Name of input column containing source IDs (required with --list).')
+    parser_check.add_argument('--chunk-size', type=int, default=100000, help='Number of rows read and checked at a time (default: 100000).')
     parser_check.set_defaults(func=check_logic)
 
     args = parser.parse_args()
@@ -572,6 +743,9 @@ def main():
         if args.samples is None and args.clip_fraction != 0.:
             parser.error('--clip-fraction can only be used with PDFs by random samples (--samples)')    
 
+    if args.command in ('encode', 'decode', 'measure', 'check') and args.chunk_size < 1:
+        parser.error(f'--chunk-size must be a positive number of rows, but got {args.chunk_size}')
+
     if args.command == 'check' and args.list and args.idcol is None:
         parser.error('--idcol is required when listing sources with flagged issues (--list)')
 
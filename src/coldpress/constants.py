@@ -1,4 +1,5 @@
 from math import exp
+import struct
 
 ###### Common constants for encoding and decoding algorithms ###################
 
@@ -8,6 +9,12 @@ NEGATIVE_Z_OFFSET = 0.020202708 # a_shift
 # Resolution in log(1+z) at the redshift of the first quantile
 LOG_DZ = 4.0e-5 # df
 
+# Packet header: epsilon byte and log(1+z) of the first quantile as a little-endian uint16
+PACKET_HEADER = struct.Struct('<BH')
+
+# Byte value that marks a big jump, stored as a big-endian uint16 in the next two bytes
+BIG_JUMP_MARKER = 255
+
 # Minimum epsilon value that can be encoded in the first byte of the header
 EPSILON_MIN = 2.0e-8
 
@@ -1,7 +1,47 @@
 import numpy as np
-import struct
 import sys
-from .constants import NEGATIVE_Z_OFFSET, LOG_DZ, EPSILON_MIN, EPSILON_BETA
+from .constants import NEGATIVE_Z_OFFSET, LOG_DZ, PACKET_HEADER, BIG_JUMP_MARKER, EPSILON_MIN, EPSILON_BETA
+from .stats import _knots
+
+def _decode_jumps(payload):
+    """Decodes the payload of a packet into the quantized jumps between quantiles.
+
+    Each jump is stored as a single byte in [0, 254], or as the escape byte
+    `BIG_JUMP_MARKER` (255) followed by the jump as a big-endian uint16.
+    Instead of walking the payload byte by byte, all bytes are taken as
+    single-byte jumps and only the (rare) escape bytes are inspected in
+    order to discard the two bytes of each big jump value. Trailing zeros
+    are padding.
+
+    Args:
+        payload (np.ndarray): A 1D uint8 array with the payload bytes.
+
+    Returns:
+        np.ndarray: A 1D integer array with the decoded jumps.
+    """
+    nonzero = np.flatnonzero(payload)
+    end = nonzero[-1]+1 if len(nonzero) > 0 else 0 # end of payload before trailing zeros
+
+    is_start = np.ones(end, dtype=bool) # marks the first byte of each encoded jump
+    for i in np.flatnonzero(payload[:end] == BIG_JUMP_MARKER):
+        if is_start[i]:
+            is_start[i+1:i+3] = False
+
+    starts = np.flatnonzero(is_start)
+    jumps = payload[starts].astype(np.int64)
+    is_big = jumps == BIG_JUMP_MARKER
+    big = starts[is_big]
+    jumps[is_big] = (payload[big+1].astype(np.int64) << 8) | payload[big+2]
+    return jumps
+
+def _packet_bytes(int32col):
+    """Returns a column of packets as a 2D uint8 array with one packet per row.
+
+    Packets are stored as big-endian int32 so that the bytes of each row are
+    in packet order. For such arrays the result is a view (no copy or byte
+    swapping); arrays with any other integer dtype are converted first.
+    """
+    return np.ascontiguousarray(int32col, dtype='>i4').view(np.uint8)
 
 def decode_quantiles(packet):
     """Decodes a byte packet back into an array of quantiles.
@@ -11,36 +51,39 @@ def decode_quantiles(packet):
     the endpoints (zmin, zmax). 
 
     Args:
-        packet (bytes): The byte string packet to decode.
+        packet (bytes or np.ndarray): The packet to decode, as a byte string
+            or any contiguous buffer of bytes (e.g., a row of a uint8 view
+            of a packet column, which avoids copying it).
 
     Returns:
         np.ndarray: A 1D array of float values representing the decoded
             quantile locations. 
     """ 
     # reconstruct epsilon and zmin
-    eps_byte = packet[0]
+    eps_byte, xmin_int = PACKET_HEADER.unpack_from(packet)
     eps = EPSILON_MIN*np.exp(EPSILON_BETA*eps_byte)
-
-    xmin_int = struct.unpack('<H', packet[1:3])[0]   
     logq_min = xmin_int*LOG_DZ - NEGATIVE_Z_OFFSET
    
     # decode the quantized jumps between consecutive quantiles
-    payload = packet[3:]
-    jumps = []
-    i = 0
-    length = len(payload)
-    while i < length:
-        b = payload[i]
-        if (b == 0) and (max(payload[i:]) == 0): # end if just trailing zeros remain
-            break
-        if b < 255:
-            d = b
-            i += 1
-        else:
-            d = struct.unpack('>H', payload[i+1:i+3])[0]
-            i += 3
-        jumps.append(d)
-        
+    jumps = _decode_jumps(np.frombuffer(packet, dtype=np.uint8, offset=PACKET_HEADER.size))
+    return _jumps_to_quantiles(jumps, eps, logq_min)
+
+def _jumps_to_quantiles(jumps, eps, logq_min):
+    """Reconstructs the quantile locations from the quantized jumps of a packet.
+
+    This is the second half of `decode_quantiles`, after the header and the
+    payload have been parsed. It is also used by `encode_quantiles` to
+    validate a packet without parsing it back.
+
+    Args:
+        jumps (np.ndarray): A 1D integer array with the jumps between
+            consecutive quantiles, in units of `eps`.
+        eps (float): The jump quantization step in log(1+z).
+        logq_min (float): The log(1+z) of the first quantile.
+
+    Returns:
+        np.ndarray: A 1D array with the decoded quantile locations.
+    """
     # remove seesaw pattern due to small jump values at high P(z)
     new_jumps = np.array(jumps).astype(float)
     insaw = False
@@ -57,9 +100,13 @@ def decode_quantiles(packet):
                 new_jumps[init_saw:end_saw] = np.mean(jumps[init_saw:end_saw])
     
     # fix zero-valued jumps by adding a tiny offset that gets compensated in the next non-zero jump    
+    # (trailing zero-valued jumps have no later jump to compensate the offset, so they are left as they are)
     if np.min(new_jumps) <= 0:
+        end = len(new_jumps)
+        while end > 0 and new_jumps[end-1] == 0:
+            end -= 1
         cumulative_offset = 0.
-        for i in range(1,len(new_jumps)):
+        for i in range(1,end):
             if new_jumps[i] == 0.:
                 new_jumps[i] += 0.05
                 cumulative_offset += 0.05
@@ -77,7 +124,149 @@ def decode_quantiles(packet):
     zs = np.empty(new_jumps.size + 1, dtype=float)
     zs[0] = logq_min
     zs[1:] = logq_min + np.cumsum(new_jumps) * eps
-    return np.exp(np.array(zs))-1
+    return np.exp(zs)-1
+
+def decode_quantiles_batch(int32col):
+    """Decodes a column of compressed PDFs into a 2D array of quantiles.
+
+    Vectorized equivalent of calling `decode_quantiles` on every packet. The
+    headers and payloads of all packets are parsed at once: the payload is
+    walked one byte position at a time across all packets, so that the two
+    bytes that follow each big-jump escape byte are skipped. The jumps are
+    then corrected and converted to quantiles in bulk by
+    `_jumps_to_quantiles_batch`, which applies the seesaw and zero-jump
+    corrections of `decode_quantiles` to all packets at once.
+
+    Args:
+        int32col (np.ndarray): A 2D numpy array of type int32, where each
+            row is a compressed PDF packet.
+
+    Returns:
+        np.ndarray: A 2D float array of shape (Nsources, Mmax), where Mmax is
+            the largest number of quantiles in a packet (at least 2). Row i holds the
+            quantiles of packet i, padded with NaN. Rows of empty packets are
+            all NaN.
+    """
+    packets = _packet_bytes(int32col)
+    Nsources, packetsize = packets.shape
+    header = PACKET_HEADER.size
+
+    # padding allows reading the value of a big jump even if a packet is truncated
+    payload = np.zeros((Nsources, packetsize-header+2), dtype=np.int64)
+    payload[:,:-2] = packets[:,header:]
+    nonzero = payload != 0
+    end = payload.shape[1] - np.argmax(nonzero[:,::-1], axis=1) # end of payload before trailing zeros
+    end[~nonzero.any(axis=1)] = 0
+
+    # mark the first byte of each encoded jump
+    is_start = np.zeros(payload.shape, dtype=bool)
+    skip = np.zeros(Nsources, dtype=np.int64) # bytes of a big jump value that remain to be skipped
+    for k in range(packetsize-header):
+        is_start[:,k] = (skip == 0) & (k < end)
+        skip = np.where(is_start[:,k] & (payload[:,k] == BIG_JUMP_MARKER), 2, np.maximum(skip-1, 0))
+
+    jumps_packed = np.where(payload[:,:-2] == BIG_JUMP_MARKER, (payload[:,1:-1] << 8) | payload[:,2:], payload[:,:-2])
+    Njumps = is_start.sum(axis=1)
+    Mmax = max(Njumps.max(initial=0) + 1, 2)
+    rows, cols = np.nonzero(is_start[:,:-2])
+    jumps = np.zeros((Nsources, Mmax-1), dtype=np.int64)
+    jumps[rows, np.cumsum(is_start[:,:-2], axis=1)[rows,cols]-1] = jumps_packed[rows, cols]
+
+    # reconstruct epsilon and zmin of every packet
+    eps = EPSILON_MIN*np.exp(EPSILON_BETA*packets[:,0].astype(np.int64))
+    xmin_int = packets[:,1].astype(np.int64) | (packets[:,2].astype(np.int64) << 8)
+    logq_min = xmin_int*LOG_DZ - NEGATIVE_Z_OFFSET
+
+    Q = _jumps_to_quantiles_batch(jumps, Njumps, eps, logq_min)
+    has_data = packets.any(axis=1)
+    Q[~has_data] = np.nan
+    return Q
+
+def _jumps_to_quantiles_batch(jumps, Njumps, eps, logq_min):
+    """Reconstructs the quantile locations of a batch of packets from their jumps.
+
+    Vectorized equivalent of calling `_jumps_to_quantiles` on every packet.
+    It is also used by `_encode_quantiles_batch` to validate packets without
+    parsing them back.
+
+    Args:
+        jumps (np.ndarray): A 2D integer array with the jumps of each packet,
+            in units of its `eps`, padded with zeros.
+        Njumps (np.ndarray): The number of jumps of each packet.
+        eps (np.ndarray): The jump quantization step of each packet.
+        logq_min (np.ndarray): The log(1+z) of the first quantile of each packet.
+
+    Returns:
+        np.ndarray: A 2D float array with the quantile locations of each
+            packet, padded with NaN.
+    """
+    Nsources, Nmax = jumps.shape
+    new_jumps = _correct_jumps_batch(jumps, Njumps)
+    zs = np.empty((Nsources, Nmax+1), dtype=float)
+    zs[:,0] = logq_min
+    zs[:,1:] = logq_min[:,None] + np.cumsum(new_jumps, axis=1) * eps[:,None]
+    Q = np.exp(zs)-1
+    Q[:,1:][np.arange(Nmax) >= Njumps[:,None]] = np.nan
+    return Q
+
+def _correct_jumps_batch(jumps, Njumps):
+    """Applies the jump corrections of `decode_quantiles` to a batch of packets.
+
+    The seesaw pattern removal is a state machine that runs along the jumps
+    of a packet, so it is run one jump position at a time for all packets
+    at once. The zero-jump offsets only depend on the number of consecutive
+    zero-valued jumps before each jump, which is found with cumulative
+    operations.
+
+    Args:
+        jumps (np.ndarray): A 2D integer array with the jumps of each packet,
+            padded with zeros.
+        Njumps (np.ndarray): The number of jumps of each packet.
+
+    Returns:
+        np.ndarray: A 2D float array with the corrected jumps.
+    """
+    Nsources, Nmax = jumps.shape
+    new_jumps = jumps.astype(float)
+    rows = np.arange(Nsources)
+    cols = np.arange(Nmax)
+
+    # remove seesaw pattern due to small jump values at high P(z)
+    csum = np.zeros((Nsources, Nmax+1), dtype=np.int64)
+    np.cumsum(jumps, axis=1, out=csum[:,1:])
+    insaw = np.zeros(Nsources, dtype=bool)
+    init_saw = np.zeros(Nsources, dtype=np.int64)
+    for i in range(1, Nmax-1):
+        active = i < Njumps-1
+        starts = active & ~insaw & (jumps[:,i] < 15) & (np.abs(jumps[:,i]-jumps[:,i-1]) == 1)
+        level = jumps[rows,init_saw]
+        ends = active & insaw & ((jumps[:,i] > 15) | (np.abs(jumps[:,i]-level) > 1))
+        smooth = np.flatnonzero(ends & (i - init_saw > 3))
+        if len(smooth) > 0:
+            first = init_saw[smooth]
+            mean = (csum[smooth,i] - csum[smooth,first]) / (i - first)
+            in_saw = (cols >= first[:,None]) & (cols < i)
+            new_jumps[smooth] = np.where(in_saw, mean[:,None], new_jumps[smooth])
+        init_saw[starts] = i-1
+        insaw = (insaw & ~ends) | starts
+
+    # fix zero-valued jumps by adding a tiny offset that gets compensated in the next non-zero jump
+    # (trailing zero-valued jumps have no later jump to compensate the offset, so they are left as they are)
+    inside = cols < Njumps[:,None]
+    nonzero = inside & (new_jumps != 0)
+    end = Nmax - np.argmax(nonzero[:,::-1], axis=1)
+    end[~nonzero.any(axis=1)] = 0
+    is_zero = (new_jumps == 0) & (cols >= 1) & (cols < end[:,None])
+    last_kept = np.maximum.accumulate(np.where(is_zero, 0, cols), axis=1) # last position that is not a fixed zero
+    zeros_before = np.zeros((Nsources, Nmax), dtype=np.int64)
+    zeros_before[:,1:] = cols[:-1] - last_kept[:,:-1]
+    offsets = np.zeros(Nmax+1)
+    for k in range(1, Nmax+1):
+        offsets[k] = offsets[k-1] + 0.05 # same rounding as the running offset of decode_quantiles
+    compensate = ~is_zero & (cols >= 1) & (cols < end[:,None]) & (zeros_before > 0)
+    new_jumps[is_zero] += 0.05
+    new_jumps[compensate] -= offsets[zeros_before[compensate]]
+    return new_jumps
 
 def quantiles_to_binned(z_quantiles, dz=None, Nbins=None, z_min=None, z_max=None, zvector=None, method='linear', force_range=False, renormalize=True):
     """Converts quantile locations into a binned probability density function (PDF).
@@ -169,9 +358,8 @@ def quantiles_to_binned(z_quantiles, dz=None, Nbins=None, z_min=None, z_max=None
     
     # Proceed with calculations
     M = len(zq)
-    Fq = np.linspace(0.0, 1.0, M)
+    Fq = _knots(M)
     dz_eff = z_grid[1] - z_grid[0] if len(z_grid) > 1 else 0
-    
     edges = np.empty(len(z_grid)+1, dtype=float)
     edges[0] = z_grid[0] - dz_eff/2
     edges[1:] = z_grid + dz_eff/2
@@ -191,9 +379,10 @@ def quantiles_to_binned(z_quantiles, dz=None, Nbins=None, z_min=None, z_max=None
     else:
         raise ValueError(f"Unknown interpolation method '{method}'. Choose 'linear' or 'spline'.")
         
+    # the bin probabilities are differences of the CDF, so their sum telescopes to its total change
     pdf = (F_grid[1:] - F_grid[:-1]) 
     if renormalize:   
-        pdf_sum = np.sum(pdf * dz_eff)
+        pdf_sum = (F_grid[-1] - F_grid[0]) * dz_eff
         if pdf_sum > 0:
             pdf /= pdf_sum
     else:
@@ -233,7 +422,7 @@ def quantiles_to_samples(z_quantiles, Nsamples=100, method='linear'):
   
     zq = np.asarray(z_quantiles)
     M = len(zq)
-    Fq = np.linspace(0.0, 1.0, M)
+    Fq = _knots(M)
    
     u = np.random.uniform(0, 1, size=Nsamples)
 
@@ -244,48 +433,86 @@ def quantiles_to_samples(z_quantiles, Nsamples=100, method='linear'):
             
     return samples
     
-def decode_to_binned(int32col, zvector, force_range=False, method='linear'):
-    """Decodes a column of compressed PDFs into a 2D array of binned PDFs.
+def _quantiles_to_binned_batch(Q, zvector, force_range=False, first_index=0):
+    """Converts a batch of quantile arrays into binned PDFs on a common grid.
 
-    This is a batch processing function that iterates over a column of
-    compressed byte packets, decodes each one into quantiles, and then
-    converts the quantiles into a binned PDF on the specified `zvector` grid.
+    Vectorized equivalent of `quantiles_to_binned` with `zvector`,
+    `method='linear'` and `renormalize=True` applied to every row of `Q`.
+    Since all rows share the same bin edges, the quantile interval that
+    contains each edge is found for all rows at once with a single
+    `np.searchsorted` of the quantiles into the edges, instead of one
+    `np.interp` call per source.
 
     Args:
-        int32col (np.ndarray): A 2D numpy array of type int32, where each
-            row is a compressed PDF packet.
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF, padded with NaN at the end if the PDFs have
+            different numbers of quantiles. Rows that are all NaN give a PDF
+            filled with zeros.
         zvector (np.ndarray): A 1D array defining the centers of the redshift
-            bins for the output PDFs.
+            bins.
         force_range (bool, optional): If True, allows PDFs to be truncated
             if their range exceeds the `zvector` grid. Defaults to False.
-        method (str, optional): Interpolation method ('linear' or 'spline')
-            for PDF reconstruction. Defaults to 'linear'.
+        first_index (int, optional): Index of the first row of `Q` in the
+            full catalog, used in error messages. Defaults to 0.
 
     Returns:
-        np.ndarray: A 2D float32 array where each row is a reconstructed
-            binned PDF corresponding to a row in `int32col`.
+        np.ndarray: A 2D array with the binned PDF for each row of `Q`.
 
     Raises:
-        ValueError: If decoding or binning fails for any source and
-            `force_range` is False.
+        ValueError: If the range of a PDF exceeds the grid and `force_range`
+            is False.
     """
-    
-    Nsources = int32col.shape[0]
-    PDF = np.zeros((Nsources,len(zvector)),dtype=np.float32)
-    
-    for i in range(Nsources):
-        if np.any(int32col[i] != 0):
-            packet = int32col[i].tobytes()
-            qrecovered = decode_quantiles(packet)
-
-            try:
-                PDF[i] = quantiles_to_binned(qrecovered, zvector=zvector, method=method, force_range=force_range)
-            except ValueError as e:
-                raise ValueError(f"Source {i}: {e}") from e
+    Nsources = Q.shape[0]
+    M = np.sum(np.isfinite(Q), axis=1)
+    has_pdf = M > 1
+    rows = np.arange(Nsources)
 
-    return PDF
-    
-def decode_to_binned(int32col, zvector, force_range=False, method='linear'):
+    # Perform the range check on all PDFs
+    dz = zvector[1]-zvector[0] if len(zvector) > 1 else 0
+    eps = 1e-10
+    zmin_q = Q[:,0]+dz/2+eps
+    zmax_q = Q[rows,np.maximum(M-1,0)]-dz/2-eps
+    zmin_grid, zmax_grid = zvector[0], zvector[-1]
+    for i in np.flatnonzero(has_pdf & ((zmin_q < zmin_grid) | (zmax_q > zmax_grid))):
+        if not force_range:
+            raise ValueError(f"Source {first_index+i}: Decoded redshift range [{zmin_q[i]:.3f}, {zmax_q[i]:.3f}] "
+                             f"exceeds the target grid range [{zmin_grid:.3f}, {zmax_grid:.3f}]. "
+                             "Use force_range=True to override.")
+        print(f"Warning: PDF range [{zmin_q[i]:.3f}, {zmax_q[i]:.3f}] truncated to grid range [{zmin_grid:.3f}, {zmax_grid:.3f}].", file=sys.stderr)
+
+    edges = np.empty(len(zvector)+1, dtype=float)
+    edges[0] = zvector[0] - dz/2
+    edges[1:] = zvector + dz/2
+    Nedges = len(edges)
+
+    # index j of the last quantile with z <= edge, so that zq[j] <= edge < zq[j+1]:
+    # zq <= edges[e] if and only if fewer than e+1 edges are below zq
+    nbelow = np.searchsorted(edges, Q, side='left') # NaN padding lands beyond the last edge
+    nbelow += (Nedges+1)*rows[:,None]
+    hist = np.bincount(nbelow.ravel(), minlength=Nsources*(Nedges+1)).reshape(Nsources, Nedges+1)
+    j = np.cumsum(hist[:,:Nedges], axis=1) - 1
+
+    # interpolate the CDF at the edges (0 below the first quantile, 1 above the last one)
+    last = np.maximum(M-1,1)[:,None]
+    jc = np.clip(j, 0, last-1)
+    z_lo = np.take_along_axis(Q, jc, axis=1)
+    z_hi = np.take_along_axis(Q, jc+1, axis=1)
+    step = 1.0/last
+    F_lo = jc*step
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = ((jc+1)*step - F_lo) / (z_hi - z_lo)
+        F_grid = np.where((j >= 0) & (j < last), slope*(edges - z_lo) + F_lo, np.where(j < 0, 0.0, 1.0))
+
+    # the bin probabilities are differences of the CDF, so their sum telescopes to its total change
+    pdf = F_grid[:,1:] - F_grid[:,:-1]
+    pdf_sum = (F_grid[:,-1] - F_grid[:,0]) * dz
+    norm = has_pdf & (pdf_sum > 0)
+    np.divide(pdf, pdf_sum[:,None], out=pdf, where=norm[:,None])
+    pdf[~has_pdf] = 0.
+
+    return pdf
+
+def decode_to_binned(int32col, zvector, force_range=False, method='linear', first_index=0):
     """Decodes a column of compressed PDFs into a 2D array with one P(z) per row
 
     This is a batch processing function that iterates over a column of
@@ -301,28 +528,39 @@ def decode_to_binned(int32col, zvector, force_range=False, method='linear'):
             if their range exceeds the `zvector` grid. Defaults to False.
         method (str, optional): Interpolation method ('linear' or 'spline')
             for PDF reconstruction. Defaults to 'linear'.
+        first_index (int, optional): Index of the first row of `int32col` in
+            the whole catalog, used to number the sources in error messages
+            when the catalog is decoded in chunks. Defaults to 0.
 
     Returns:
         np.ndarray: A 2D float32 array where each row is a reconstructed
-            P(z) corresponding to a row in `int32col`.
+            P(z) corresponding to a packet in `int32col`.
 
     Raises:
         ValueError: If decoding or interpolation fails for any source and
             `force_range` is False.
     """
-    
-    Nsources = int32col.shape[0]
+    packets = _packet_bytes(int32col)
+    has_data = packets.any(axis=1)
+    Nsources = packets.shape[0]
     PDF = np.zeros((Nsources,len(zvector)),dtype=np.float32)
-    
-    for i in range(Nsources):
-        if np.any(int32col[i] != 0):
-            packet = int32col[i].tobytes()
-            qrecovered = decode_quantiles(packet)
 
-            try:
-                PDF[i] = quantiles_to_density(qrecovered, zvector=zvector, method=method, force_range=force_range)
-            except ValueError as e:
-                raise ValueError(f"Source {i}: {e}") from e
+    # decode all sources first, then reconstruct P(z)
+    Q = decode_quantiles_batch(packets.view('>i4'))
+
+    if method == 'linear':
+        block = max(1, 2**20 // (len(zvector)+1)) # bound the size of temporary arrays
+        for start in range(0, Nsources, block):
+            PDF[start:start+block] = _quantiles_to_binned_batch(Q[start:start+block], zvector, force_range=force_range, first_index=first_index+start)
+        return PDF
+
+    for i in np.flatnonzero(has_data):
+        qrecovered = Q[i][~np.isnan(Q[i])]
+
+        try:
+            PDF[i] = quantiles_to_density(qrecovered, zvector=zvector, method=method, force_range=force_range)
+        except ValueError as e:
+            raise ValueError(f"Source {first_index+i}: {e}") from e
 
     return PDF
         
@@ -351,18 +589,18 @@ def decode_to_samples(int32col, Nsamples=None, method='linear'):
         ValueError: If decoding or sampling fails for any source.
     """
     
-    Nsources = int32col.shape[0]
+    packets = _packet_bytes(int32col)
+    Nsources = packets.shape[0]
     samples = np.full((Nsources,Nsamples),np.nan,dtype=np.float32)
     
-    for i in range(Nsources):
-        if np.any(int32col[i] != 0):
-            packet = int32col[i].tobytes()
-            qrecovered = decode_quantiles(packet)
+    Q = decode_quantiles_batch(packets.view('>i4'))
+    for i in np.flatnonzero(packets.any(axis=1)):
+        qrecovered = Q[i][~np.isnan(Q[i])]
 
-            try:
-                samples[i] = quantiles_to_samples(qrecovered, Nsamples=Nsamples, method=method)
-            except ValueError as e:
-                raise ValueError(f"Source {i}: {e}") from e
+        try:
+            samples[i] = quantiles_to_samples(qrecovered, Nsamples=Nsamples, method=method)
+        except ValueError as e:
+            raise ValueError(f"Source {i}: {e}") from e
 
-    return PDF
+    return samples
     
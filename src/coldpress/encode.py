@@ -1,8 +1,6 @@
 import numpy as np
-import struct
-from .constants import NEGATIVE_Z_OFFSET, LOG_DZ, EPSILON_MIN, EPSILON_BETA, Q0_ZMIN, Q0_ZMAX
-import sys
-import time
+from .constants import NEGATIVE_Z_OFFSET, LOG_DZ, PACKET_HEADER, BIG_JUMP_MARKER, EPSILON_MIN, EPSILON_BETA, Q0_ZMIN
+from .stats import _knots
 
 
 def samples_to_quantiles(sorted_samples, Nquantiles=100):
@@ -24,10 +22,45 @@ def samples_to_quantiles(sorted_samples, Nquantiles=100):
         np.ndarray: A 1D array of `Nquantiles` values representing the
             quantile locations.
     """        
-    targets = np.linspace(0.0, 1.0, Nquantiles) # target probability for quantiles 
+    targets = _knots(Nquantiles) # target probability for quantiles 
     return np.quantile(sorted_samples, targets, method='linear')
 
 
+def samples_to_quantiles_batch(sorted_samples, Nquantiles=100):
+    """Calculates quantiles for a batch of PDFs given as random samples.
+
+    Vectorized equivalent of calling `samples_to_quantiles` on the finite
+    samples of every row. Since the samples are already sorted, the two
+    samples that bracket each quantile are picked directly and interpolated
+    as in `np.quantile` with `method='linear'`, without sorting again.
+
+    Args:
+        sorted_samples (np.ndarray): A 2D array where each row holds the
+            samples of one PDF sorted by increasing value, padded with NaN
+            at the end if the rows have different numbers of samples.
+            Every row must have at least one finite sample.
+        Nquantiles (int, optional): The number of quantiles to compute.
+            Defaults to 100.
+
+    Returns:
+        np.ndarray: A 2D array of shape (Nsources, `Nquantiles`) with the
+            quantile locations for each PDF.
+    """
+    targets = _knots(Nquantiles) # target probability for quantiles
+    nsamples = np.sum(np.isfinite(sorted_samples), axis=1)
+    virtual = (nsamples[:,None]-1) * targets
+    lo = np.minimum(np.floor(virtual).astype(np.intp), (nsamples-1)[:,None])
+    hi = np.minimum(lo+1, (nsamples-1)[:,None])
+    gamma = virtual - lo
+    a = np.take_along_axis(sorted_samples, lo, axis=1)
+    b = np.take_along_axis(sorted_samples, hi, axis=1)
+    # same interpolation as np.quantile, which works from the nearest sample
+    diff = b - a
+    quantiles = a + diff * gamma
+    np.subtract(b, diff * (1-gamma), out=quantiles, where=gamma >= 0.5)
+    return quantiles
+
+
 def binned_to_quantiles(z_grid, Pz, Nquantiles=100):
     """Calculates quantiles from a binned probability density function (PDF).
 
@@ -73,11 +106,117 @@ def binned_to_quantiles(z_grid, Pz, Nquantiles=100):
     cdf_edges /= cdf_edges[-1]
 
     # compute quantiles
-    targets = np.linspace(0.0, 1.0, Nquantiles) # target probability for quantiles
+    targets = _knots(Nquantiles) # target probability for quantiles
     qs = np.interp(targets, cdf_edges, edges)
 
     return qs
-    
+
+def binned_to_quantiles_batch(z_grid, PDF, Nquantiles=100):
+    """Calculates quantiles for a batch of binned PDFs sharing the same grid.
+
+    Vectorized equivalent of calling `binned_to_quantiles` on every row of
+    `PDF`. The CDFs of all rows are built with a single cumulative sum, and
+    since all rows share the same evenly spaced target probabilities, the
+    CDF intervals that bracket each target are found by bucketing all the
+    CDF values at once, instead of calling `np.interp` on each row.
+
+    Args:
+        z_grid (np.ndarray): A 1D array of the redshift bin centers.
+        PDF (np.ndarray): A 2D array where each row is a binned PDF. All rows
+            must have at least one bin with positive probability.
+        Nquantiles (int, optional): The number of quantiles to compute.
+            Defaults to 100.
+
+    Returns:
+        np.ndarray: A 2D array of shape (Nsources, `Nquantiles`) with the
+            quantile locations for each PDF.
+    """
+    edges, cdf_edges, jmax = _binned_cdf_batch(z_grid, PDF)
+    return _cdf_to_quantiles_batch(edges, cdf_edges, jmax, Nquantiles)
+
+def _binned_cdf_batch(z_grid, PDF):
+    """Builds the CDFs of a batch of binned PDFs at the edges of the bins.
+
+    This is the first half of `binned_to_quantiles_batch`. The CDFs do not
+    depend on the number of quantiles, so `_batch_encode` computes them once
+    and reuses them in every encoding round.
+
+    Args:
+        z_grid (np.ndarray): A 1D array of the redshift bin centers.
+        PDF (np.ndarray): A 2D array where each row is a binned PDF.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: A tuple containing:
+            - edges (np.ndarray): The Nbins+1 edges of the bins.
+            - cdf_edges (np.ndarray): A 2D array with the normalized CDF of
+              each PDF at the edges.
+            - jmax (np.ndarray): The index of the upper edge of the last bin
+              with nonzero probability of each PDF.
+    """
+    PDF = np.asarray(PDF, dtype=float)
+    Nsources, Nbins = PDF.shape
+
+    # compute edges of bins
+    dz = z_grid[1] - z_grid[0]
+    edges = np.empty(Nbins+1, dtype=float)
+    edges[0] = z_grid[0] - dz/2
+    edges[1:] = z_grid + dz/2
+
+    # Build CDFs at edges for all sources and normalize them to end at 1
+    cdf_edges = np.zeros((Nsources, Nbins+1), dtype=float)
+    np.cumsum(PDF * dz, axis=1, out=cdf_edges[:, 1:])
+    cdf_edges /= cdf_edges[:, -1:]
+
+    jmax = Nbins - np.argmax(PDF[:, ::-1] > 0, axis=1)
+    return edges, cdf_edges, jmax
+
+def _cdf_to_quantiles_batch(edges, cdf_edges, jmax, Nquantiles):
+    """Computes the quantiles of a batch of PDFs from their CDFs at the bin edges.
+
+    This is the second half of `binned_to_quantiles_batch`.
+
+    Args:
+        edges (np.ndarray): The Nbins+1 edges of the bins.
+        cdf_edges (np.ndarray): A 2D array with the normalized CDF of each
+            PDF at the edges.
+        jmax (np.ndarray): The index of the upper edge of the last bin with
+            nonzero probability of each PDF.
+        Nquantiles (int): The number of quantiles to compute.
+
+    Returns:
+        np.ndarray: A 2D array of shape (Nsources, `Nquantiles`) with the
+            quantile locations for each PDF.
+    """
+    Nsources, Nbins = cdf_edges.shape[0], cdf_edges.shape[1]-1
+
+    targets = _knots(Nquantiles) # target probability for quantiles
+
+    # cdf <= targets[m] if and only if fewer than m+1 targets are below cdf, so the
+    # number of edges with cdf <= targets[m] follows from a histogram of those counts.
+    # The targets are evenly spaced, so the number of targets below cdf is given
+    # directly by ceil(cdf*(Nquantiles-1)) without a binary search.
+    nbelow = cdf_edges * (Nquantiles-1)
+    np.ceil(nbelow, out=nbelow)
+    nbelow += (Nquantiles+1)*np.arange(Nsources)[:, None]
+    hist = np.bincount(nbelow.astype(np.intp).ravel(), minlength=Nsources*(Nquantiles+1)).reshape(Nsources, Nquantiles+1)
+
+    # index j of the last edge with cdf <= target, so that cdf[j] <= target < cdf[j+1]
+    j = np.cumsum(hist[:, :Nquantiles], axis=1) - 1
+    j = np.clip(j, 0, Nbins-1)
+    cdf_lo = np.take_along_axis(cdf_edges, j, axis=1)
+    cdf_hi = np.take_along_axis(cdf_edges, j+1, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        frac = (targets[None, :] - cdf_lo) / (cdf_hi - cdf_lo)
+    # rounding in the bucket formula can only misplace targets that are within
+    # rounding error of an edge, and clipping moves them back to that edge
+    np.clip(frac, 0.0, 1.0, out=frac)
+    qs = edges[j] + frac*(edges[j+1] - edges[j])
+
+    # the last quantile is the upper edge of the last bin with nonzero probability
+    qs[:, -1] = edges[jmax]
+
+    return qs
+
 def density_to_quantiles(zvector, pdf_density, Nquantiles=100, upsample_factor=10):
     """
     Calculates quantile redshifts from a PDF sampled on a grid.
@@ -129,7 +268,7 @@ def density_to_quantiles(zvector, pdf_density, Nquantiles=100, upsample_factor=1
         cdf /= cdf[-1]
 
     # 3. Define the target probabilities for the desired quantiles.
-    target_quantiles = np.linspace(0, 1, Nquantiles)
+    target_quantiles = _knots(Nquantiles)
 
     # 4. Interpolate the inverted CDF to find the redshift for each target quantile.
     quantile_redshifts = np.interp(target_quantiles, cdf, z_hires)
@@ -172,7 +311,7 @@ def encode_quantiles(quantiles, packetsize=80, validate=True, tolerance=0.0001):
             payload exceeds the packet size, or if validation fails.
     """
 
-    from .decode import decode_quantiles # Local import to avoid circular dependency at module level
+    from .decode import _jumps_to_quantiles # Local import to avoid circular dependency at module level
 
     Nq = len(quantiles)
     if Nq > packetsize-2:
@@ -190,9 +329,10 @@ def encode_quantiles(quantiles, packetsize=80, validate=True, tolerance=0.0001):
     logq[0] = logq_min
     
     # find optimal value for epsilon
-    gaps = np.sort(logq[1:]-logq[:-1])
-
     max_big_gaps = ((packetsize-3)-(Nq-1)) // 2 # maximum number of big gaps that fit in packet for Nq quantiles
+
+    # only the (max_big_gaps+1)-th largest and the largest gaps are needed, so a partial sort suffices
+    gaps = np.partition(logq[1:]-logq[:-1], [-(max_big_gaps+1), -1])
     eps_min2 = gaps[-(max_big_gaps+1)]/254 # all but n=max_big_gaps gaps must fit in 1 byte (and value 255 is reserved)
     eps_min3 = gaps[-1]/(256**2 -1) # the largest gap must fit in a 3-byte big gap
     
@@ -204,45 +344,157 @@ def encode_quantiles(quantiles, packetsize=80, validate=True, tolerance=0.0001):
         
     eps = EPSILON_MIN*np.exp(EPSILON_BETA*eps_byte) # actual epsilon represented by the encoded value
         
-    # build payload from the quantiles 1 to N-1
-    payload = bytearray()
-    prev = logq_min
-    for z in logq[1:]:
-        d = int(round((z - prev) / eps))
-        if 0 <= d <= 254:
-            payload.append(d)
-        else:
-            payload.append(255)
-            payload += struct.pack('>H', d)
-        prev = prev + d * eps
-
-    L = len(payload)
-    if L > packetsize-3: 
+    # quantize the position of every quantile relative to the first one: the jumps are the
+    # differences of the rounded positions, so rounding errors do not accumulate along the packet
+    positions = np.round((logq[1:] - logq_min) / eps).astype(np.int64)
+    jumps = np.diff(positions, prepend=0)
+    if np.any((jumps < 0) | (jumps > 0xFFFF)):
+        raise ValueError(f'Error: quantile jumps cannot be encoded with epsilon={eps:.3e}.')
+
+    # jumps >= BIG_JUMP_MARKER take 3 bytes (escape byte + uint16)
+    is_big = jumps >= BIG_JUMP_MARKER
+    nbytes = np.where(is_big, 3, 1)
+    L = int(np.sum(nbytes)) # length of the payload
+    if L > packetsize-3:
         raise ValueError(f'Error: payload of length {L} does not fit in packet of size {packetsize}.')
 
-    packet = bytearray(packetsize)
-    packet[0] = eps_byte
-    packet[1:3] = struct.pack('<H', xmin_int)            
-    packet[3:3+L] = payload
-
     if validate: 
-        qrecovered = decode_quantiles(packet)
-        if len(qrecovered) != len(quantiles):
-           print('Error: packet decodes to wrong number of quantiles.')
-           print('packet: ',[int(x) for x in packet])
-           print('recovered quantiles:')
-           print(qrecovered)
-           print('original quantiles:')
-           print(quantiles)
-           import code
-           code.interact(local=locals())
-           
-           # raise ValueError('Error: packet decodes to wrong number of quantiles.')
+        # a zero jump at the end of the payload is read back as padding, so the packet would lose a quantile
+        if jumps[-1] == 0:
+            raise ValueError('Error: packet decodes to wrong number of quantiles.')
+        # otherwise the decoder would read back exactly these jumps, so only their conversion to quantiles is repeated
+        qrecovered = _jumps_to_quantiles(jumps, eps, logq_min)
         shift = quantiles[1:]-qrecovered[1:]
         if max(abs(shift)) > tolerance:
-            raise ValueError('Error: shift in quantiles exceeds tolerance = {tolerance:.5f}.')
-    
-    return L, bytes(packet)
+            raise ValueError(f'Error: shift in quantiles exceeds tolerance = {tolerance:.5f}.')
+
+    # write header and payload
+    packet = np.zeros(packetsize, dtype=np.uint8)
+    PACKET_HEADER.pack_into(packet, 0, eps_byte, xmin_int)
+    offsets = 3 + np.cumsum(nbytes) - nbytes
+    packet[offsets[~is_big]] = jumps[~is_big]
+    big_offsets = offsets[is_big]
+    packet[big_offsets] = BIG_JUMP_MARKER
+    packet[big_offsets+1] = jumps[is_big] >> 8
+    packet[big_offsets+2] = jumps[is_big] & 0xFF
+
+    return L, packet.tobytes()
+
+def _encode_quantiles_batch(Q, packetsize=80, validate=True, tolerance=0.0001):
+    """Batched equivalent of `encode_quantiles` for PDFs with the same number of quantiles.
+
+    Every step of `encode_quantiles` (epsilon selection, quantization of the
+    jumps and writing of the packets) is applied to all the rows at once.
+    Only the validation, which needs the decoder, is done one row at a time.
+    Instead of raising ValueError, PDFs that cannot be encoded are flagged
+    with a payload length of -1.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF.
+        packetsize (int, optional): The total size of the output byte packets.
+            Defaults to 80.
+        validate (bool, optional): If True, checks that the reconstructed
+            quantiles are within the specified tolerance. Defaults to True.
+        tolerance (float, optional): The maximum allowed absolute difference
+            between original and recovered quantiles during validation.
+            Defaults to 0.0001.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: A tuple containing:
+            - L (np.ndarray): The payload length of each packet, or -1 for
+              the PDFs that could not be encoded.
+            - packets (np.ndarray): A 2D uint8 array of shape
+              (len(Q), `packetsize`) with the packets. Rows of failed PDFs
+              are zero.
+    """
+    from .decode import _jumps_to_quantiles_batch # Local import to avoid circular dependency at module level
+
+    Nsources, Nq = Q.shape
+    packets = np.zeros((Nsources, packetsize), dtype=np.uint8)
+    if Nq > packetsize-2:
+        return np.full(Nsources, -1), packets
+
+    logq = np.log(1+Q) # convert quantiles to log(1+z) scale
+
+    # encode the first quantile as uint16
+    xmin_int = np.floor((logq[:,0]+NEGATIVE_Z_OFFSET)/LOG_DZ).astype(np.int64)
+    logq_min = xmin_int*LOG_DZ - NEGATIVE_Z_OFFSET
+    logq[:,0] = logq_min
+
+    # find optimal value for epsilon
+    max_big_gaps = ((packetsize-3)-(Nq-1)) // 2
+    if max_big_gaps+1 > Nq-1:
+        return np.full(Nsources, -1), packets
+    gaps = np.partition(logq[:,1:]-logq[:,:-1], [-(max_big_gaps+1), -1], axis=1)
+    eps_target = np.maximum(np.maximum(EPSILON_MIN, gaps[:,-(max_big_gaps+1)]/254), gaps[:,-1]/(256**2 -1))
+    eps_byte = np.ceil(np.log(eps_target/EPSILON_MIN)/EPSILON_BETA).astype(np.int64)
+    eps = EPSILON_MIN*np.exp(EPSILON_BETA*eps_byte)
+
+    # quantize the jumps and compute the payload lengths
+    positions = np.round((logq[:,1:] - logq_min[:,None]) / eps[:,None]).astype(np.int64)
+    jumps = np.diff(positions, axis=1, prepend=0)
+    is_big = jumps >= BIG_JUMP_MARKER
+    nbytes = np.where(is_big, 3, 1)
+    L = np.sum(nbytes, axis=1)
+
+    ok = (eps_byte <= 255) & (xmin_int >= 0) & (xmin_int <= 0xFFFF) & (L <= packetsize-3)
+    ok &= np.all((jumps >= 0) & (jumps <= 0xFFFF), axis=1)
+    if validate:
+        ok &= jumps[:,-1] != 0 # a final zero jump would be read back as padding
+        rows = np.flatnonzero(ok)
+        qrecovered = _jumps_to_quantiles_batch(jumps[rows], np.full(len(rows), Nq-1), eps[rows], logq_min[rows])
+        ok[rows] = np.max(np.abs(Q[rows,1:]-qrecovered[:,1:]), axis=1) <= tolerance
+
+    # write headers and payloads of the encoded PDFs
+    rows = np.flatnonzero(ok)
+    packets[rows,0] = eps_byte[rows]
+    packets[rows,1] = xmin_int[rows] & 0xFF # uint16 little-endian
+    packets[rows,2] = xmin_int[rows] >> 8
+    offsets = 3 + np.cumsum(nbytes[rows], axis=1) - nbytes[rows]
+    r = np.broadcast_to(rows[:,None], offsets.shape)
+    small = ~is_big[rows]
+    big = is_big[rows]
+    packets[r[small], offsets[small]] = jumps[rows][small]
+    packets[r[big], offsets[big]] = BIG_JUMP_MARKER
+    packets[r[big], offsets[big]+1] = jumps[rows][big] >> 8
+    packets[r[big], offsets[big]+2] = jumps[rows][big] & 0xFF
+
+    L[~ok] = -1
+    return L, packets
+
+def _batch_quantiles(data, rows, Nquantiles):
+    """Internal helper that computes the quantiles for a subset of PDFs.
+
+    Binned PDFs are processed in blocks of rows that bound the size of the
+    temporary arrays, starting from the CDFs precomputed by `_batch_encode`.
+    Random samples are processed all at once, and PDFs given as densities
+    one at a time.
+
+    Args:
+        data (dict): A dictionary containing the PDF data and format, as
+            passed to `_batch_encode`.
+        rows (np.ndarray): Indices of the PDFs in `data['PDF']`.
+        Nquantiles (int): The number of quantiles to compute.
+
+    Returns:
+        np.ndarray: A 2D array of shape (len(rows), `Nquantiles`) with the
+            quantiles of each PDF.
+    """
+    quantiles = np.empty((len(rows),Nquantiles), dtype=float)
+    if data['format'] == 'PDF_histogram':
+        edges, cdf_edges, jmax = data['cdf']
+        block = max(1, 2**20 // len(edges))
+        for start in range(0, len(rows), block):
+            r = rows[start:start+block]
+            quantiles[start:start+block] = _cdf_to_quantiles_batch(edges, cdf_edges[r], jmax[r], Nquantiles)
+    if data['format'] == 'PDF_density':
+        for k, i in enumerate(rows):
+            quantiles[k] = density_to_quantiles(data['zvector'],data['PDF'][i],Nquantiles=Nquantiles)
+    if data['format'] == 'samples':
+        # nan values at the end of the rows indicate missing samples
+        quantiles[:] = samples_to_quantiles_batch(data['PDF'][rows], Nquantiles=Nquantiles)
+    return quantiles
 
 def _batch_encode(data, ini_quantiles=72, packetsize=80, tolerance=None, validate=None):
     """Internal helper function for batch encoding of PDFs.
@@ -270,8 +522,9 @@ def _batch_encode(data, ini_quantiles=72, packetsize=80, tolerance=None, validat
             integer), where each row is a compressed PDF packet.
 
     Raises:
-        ValueError: If `packetsize` is not a multiple of 4 or if
-            `ini_quantiles` is too large.
+        ValueError: If `packetsize` is not a multiple of 4, if
+            `ini_quantiles` is too large, or if a PDF cannot be encoded
+            even with very few quantiles.
     """   
     if packetsize % 4 != 0:
         raise ValueError(f"Error: packetsize must be a multiple of 4, but got {packetsize}.")
@@ -281,52 +534,48 @@ def _batch_encode(data, ini_quantiles=72, packetsize=80, tolerance=None, validat
 
     NPDFs = data['PDF'].shape[0]
     int32col = np.zeros((NPDFs,packetsize//4),dtype='>i4') 
-
-    start = time.process_time()
-
-    for i in range(NPDFs):
-        Nquantiles = ini_quantiles
-        lastgood = None
-        while True:
-            if data['format'] == 'PDF_histogram':    
-                quantiles = binned_to_quantiles(data['zvector'],data['PDF'][i],Nquantiles=Nquantiles)
-            if data['format'] == 'PDF_density':    
-                quantiles = density_to_quantiles(data['zvector'],data['PDF'][i],Nquantiles=Nquantiles)
-            if data['format'] == 'samples':
-                valid = np.isfinite(data['PDF'][i]) # nan values indicate missing samples
-                quantiles = samples_to_quantiles(data['PDF'][i,valid],Nquantiles=Nquantiles)
-
-            try:
-                payload_length, packet = encode_quantiles(quantiles,packetsize=packetsize,tolerance=tolerance,validate=validate)
-            except ValueError as e:
-                if 'packet decodes' in str(e):
-                    print(e,file=sys.stderr)
-                    sys.exit(1)
-                
-                if lastgood is not None:
-                    packet = lastgood
-                    break
-                else:
-                    if Nquantiles < 10:
-                        print('Error: the quantile counts have decreased too much!')
-                        import code
-                        code.interact(local=locals())
-                    Nquantiles -= 2
-                    continue    
-
-            if payload_length < packetsize-3:
-                lastgood = packet
-                Nquantiles += 2
-                continue
-
-            if payload_length == packetsize-3:
-                break
-         
-        int32col[i] = np.frombuffer(packet, dtype='>i4')
-
-    end = time.process_time()
-    cpu_seconds = end - start
-    print(f"{NPDFs} PDFs cold-pressed in {cpu_seconds:.6f} CPU seconds")
+    packets = int32col.view(np.uint8) # one packet per row, written byte by byte
+
+    if data['format'] == 'PDF_histogram':
+        # the CDFs do not depend on the number of quantiles, so they are built once
+        # and reused in every round (retries only change the number of quantiles)
+        Nbins = data['PDF'].shape[1]
+        cdf_edges = np.empty((NPDFs, Nbins+1), dtype=float)
+        jmax = np.empty(NPDFs, dtype=np.int64)
+        edges = None
+        block = max(1, 2**20 // (Nbins+1))
+        for first in range(0, NPDFs, block):
+            edges, cdf_edges[first:first+block], jmax[first:first+block] = _binned_cdf_batch(data['zvector'], data['PDF'][first:first+block])
+        data = dict(data, cdf=(edges, cdf_edges, jmax))
+
+    # Sources are encoded in rounds: in each round, the quantiles of all the sources
+    # that are tried with the same number of quantiles are computed and encoded in one batch
+    Nquantiles = np.full(NPDFs, ini_quantiles)
+    has_packet = np.zeros(NPDFs, dtype=bool) # a packet shorter than packetsize is already stored
+    pending = np.arange(NPDFs)
+    while len(pending) > 0:
+        retry = []
+        for Nq in np.unique(Nquantiles[pending]):
+            rows = pending[Nquantiles[pending] == Nq]
+            L, encoded = _encode_quantiles_batch(_batch_quantiles(data, rows, Nq), packetsize=packetsize, tolerance=tolerance, validate=validate)
+
+            # PDFs that fail to encode are retried with fewer quantiles,
+            # unless a shorter packet was already stored for them
+            failed = rows[(L < 0) & ~has_packet[rows]]
+            if Nq < 10 and len(failed) > 0:
+                raise ValueError(f"Error: source {failed[0]} could not be encoded in {packetsize} bytes with {Nq} or more quantiles.")
+            Nquantiles[failed] -= 2
+            retry.extend(failed)
+
+            # packets that fit are stored, and those that leave room are retried with more quantiles
+            fits = L >= 0
+            packets[rows[fits]] = encoded[fits]
+            shorter = rows[fits & (L < packetsize-3)]
+            has_packet[shorter] = True
+            Nquantiles[shorter] += 2
+            retry.extend(shorter)
+
+        pending = np.sort(np.array(retry, dtype=int))
 
     return int32col
 
@@ -407,7 +656,6 @@ def encode_from_samples(samples, ini_quantiles=71, packetsize=80, tolerance=None
     Returns:
         np.ndarray: A 2D array where each row is a compressed PDF packet.
     """
-    
     # define default clip_range if not provided
     if clip_range is None:
         clip_range=[Q0_ZMIN,20]
@@ -450,4 +698,4 @@ def encode_from_samples(samples, ini_quantiles=71, packetsize=80, tolerance=None
     
     data = {'format': 'samples', 'PDF': clean_samples}
     encoded[valid_source] = _batch_encode(data, ini_quantiles=ini_quantiles, packetsize=packetsize, tolerance=tolerance, validate=validate)
-    return encoded
\ No newline at end of file
+    return encoded
@@ -19,6 +19,63 @@ QUANTITY_DESCRIPTIONS = {
 
 ALL_QUANTITIES = set(QUANTITY_DESCRIPTIONS.keys())
 
+_knots_cache = {}
+
+def _knots(Nq):
+    """Returns the cumulative probabilities of `Nq` evenly spaced quantiles.
+
+    Equivalent to `np.linspace(0, 1, Nq)`, but the arrays are cached by
+    `Nq` since all the PDFs in a catalog typically share the same number of
+    quantiles. They are read-only because they are shared between calls.
+    """
+    knots = _knots_cache.get(Nq)
+    if knots is None:
+        knots = np.linspace(0, 1, Nq)
+        knots.flags.writeable = False
+        _knots_cache[Nq] = knots
+    return knots
+
+_DEPENDENCIES = {
+    'Z_MODE': ['Z_MIN_HPDCI68','Z_MAX_HPDCI68'],
+    'Z_MODE_ERR': ['Z_MIN_HPDCI68','Z_MAX_HPDCI68'],
+    'ODDS_MODE': ['Z_MODE','Z_MIN_HPDCI68','Z_MAX_HPDCI68'],
+    'ODDS_MEAN': ['Z_MEAN']
+}
+
+_plan_cache = {}
+
+def _measurement_plan(quantities_to_measure):
+    """Resolves the quantities requested from `measure_from_quantiles`.
+
+    Returns the set of quantities to report and the set of all the
+    quantities that must be calculated to obtain them. The result only
+    depends on the requested names, so it is cached for repeated calls
+    with the same request.
+
+    Raises:
+        ValueError: If an unknown quantity is requested.
+    """
+    key = tuple(quantities_to_measure)
+    plan = _plan_cache.get(key)
+    if plan is None:
+        requested_q = {q.upper() for q in key}
+        if 'ALL' in requested_q:
+            q_to_compute = ALL_QUANTITIES
+        else:
+            unknown_q = requested_q - ALL_QUANTITIES
+            if unknown_q:
+                raise ValueError(f"Unknown quantities specified: {', '.join(unknown_q)}")
+            q_to_compute = requested_q
+
+        # Resolve dependencies to determine all internal calculations needed
+        internal_calcs = set(q_to_compute)
+        for q in q_to_compute:
+            if q in _DEPENDENCIES:
+                internal_calcs.update(_DEPENDENCIES[q])
+        plan = (frozenset(q_to_compute), frozenset(internal_calcs))
+        _plan_cache[key] = plan
+    return plan
+
 def measure_from_quantiles(quantiles, quantities_to_measure, odds_window=0.03):
     """Computes a set of statistical quantities from a PDF's quantiles.
 
@@ -45,29 +102,8 @@ def measure_from_quantiles(quantiles, quantities_to_measure, odds_window=0.03):
     Raises:
         ValueError: If an unknown quantity is requested.
     """
-    dependencies = {
-        'Z_MODE': ['Z_MIN_HPDCI68','Z_MAX_HPDCI68'],
-        'Z_MODE_ERR': ['Z_MODE'],
-        'ODDS_MODE': ['Z_MODE'],
-        'ODDS_MEAN': ['Z_MEAN']
-    }
-
-    # Determine which quantities to compute
-    requested_q = {q.upper() for q in quantities_to_measure}
-
-    if 'ALL' in requested_q:
-        q_to_compute = ALL_QUANTITIES
-    else:
-        unknown_q = requested_q - ALL_QUANTITIES
-        if unknown_q:
-            raise ValueError(f"Unknown quantities specified: {', '.join(unknown_q)}")
-        q_to_compute = requested_q
-
-    # Resolve dependencies to determine all internal calculations needed
-    internal_calcs = set(q_to_compute)
-    for q in q_to_compute:
-        if q in dependencies:
-            internal_calcs.update(dependencies[q])
+    # Determine which quantities to compute, and all internal calculations needed
+    q_to_compute, internal_calcs = _measurement_plan(quantities_to_measure)
 
     # --- Perform all necessary calculations ---
     temp_results = {}
@@ -88,7 +124,7 @@ def measure_from_quantiles(quantiles, quantities_to_measure, odds_window=0.03):
     if 'Z_RANDOM' in internal_calcs:
         temp_results['Z_RANDOM'] = zrandom_from_quantiles(quantiles)
     if 'Z_MEAN_ERR' in internal_calcs:
-        temp_results['Z_MEAN_ERR'] = zmean_err_from_quantiles(quantiles)
+        temp_results['Z_MEAN_ERR'] = zmean_err_from_quantiles(quantiles, zmean=temp_results.get('Z_MEAN'))
     if 'ODDS_MODE' in internal_calcs:
         temp_results['ODDS_MODE'] = odds_from_quantiles(quantiles, temp_results['Z_MODE'], odds_window=odds_window)
     if 'ODDS_MEAN' in internal_calcs:
@@ -101,6 +137,65 @@ def measure_from_quantiles(quantiles, quantities_to_measure, odds_window=0.03):
     
     return final_results
 
+def measure_from_quantiles_batch(Q, quantities_to_measure, odds_window=0.03):
+    """Computes a set of statistical quantities for a batch of PDFs.
+
+    Vectorized equivalent of calling `measure_from_quantiles` on every row
+    of `Q`. The rows are grouped by their number of quantiles, and each
+    group is processed with the batched estimators.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF, padded with NaN at the end if the PDFs have
+            different numbers of quantiles (as returned by
+            `decode_quantiles_batch`). Rows with fewer than 2 quantiles give NaN.
+        quantities_to_measure (list[str]): A list of strings specifying the
+            desired quantities, as in `measure_from_quantiles`.
+        odds_window (float, optional): The half-width of the integration
+            window for odds calculations, as a fraction of (1+z).
+            Defaults to 0.03.
+
+    Returns:
+        dict[str, np.ndarray]: A dictionary mapping the name of each requested
+            quantity to a 1D array with its value for each row of `Q`.
+
+    Raises:
+        ValueError: If an unknown quantity is requested.
+    """
+    q_to_compute, internal_calcs = _measurement_plan(quantities_to_measure)
+
+    Nsources = Q.shape[0]
+    results = {key: np.full(Nsources, np.nan) for key in q_to_compute}
+    M = np.sum(np.isfinite(Q), axis=1)
+    for Nq in np.unique(M[M > 1]):
+        rows = np.flatnonzero(M == Nq)
+        Qg = Q[rows,:Nq]
+        temp_results = {}
+        if 'Z_MIN_HPDCI68' in internal_calcs or 'Z_MAX_HPDCI68' in internal_calcs:
+            temp_results['Z_MIN_HPDCI68'], temp_results['Z_MAX_HPDCI68'] = HPDCI_from_quantiles_batch(Qg, conf=0.68)
+        if 'Z_MIN_HPDCI95' in internal_calcs or 'Z_MAX_HPDCI95' in internal_calcs:
+            temp_results['Z_MIN_HPDCI95'], temp_results['Z_MAX_HPDCI95'] = HPDCI_from_quantiles_batch(Qg, conf=0.95)
+        if 'Z_MODE' in internal_calcs:
+            temp_results['Z_MODE'] = zmode_from_quantiles_batch(Qg, hpdci68=(temp_results['Z_MIN_HPDCI68'],temp_results['Z_MAX_HPDCI68']))
+        if 'Z_MEAN' in internal_calcs:
+            temp_results['Z_MEAN'] = zmean_from_quantiles_batch(Qg)
+        if 'Z_MEDIAN' in internal_calcs:
+            temp_results['Z_MEDIAN'] = zmedian_from_quantiles_batch(Qg)
+        if 'Z_RANDOM' in internal_calcs:
+            temp_results['Z_RANDOM'] = zrandom_from_quantiles_batch(Qg)
+        if 'Z_MEAN_ERR' in internal_calcs:
+            temp_results['Z_MEAN_ERR'] = zmean_err_from_quantiles_batch(Qg, zmean=temp_results.get('Z_MEAN'))
+        if 'ODDS_MODE' in internal_calcs:
+            temp_results['ODDS_MODE'] = odds_from_quantiles_batch(Qg, temp_results['Z_MODE'], odds_window=odds_window)
+        if 'ODDS_MEAN' in internal_calcs:
+            temp_results['ODDS_MEAN'] = odds_from_quantiles_batch(Qg, temp_results['Z_MEAN'], odds_window=odds_window)
+        if 'Z_MODE_ERR' in internal_calcs:
+            temp_results['Z_MODE_ERR'] = 0.5 * (temp_results['Z_MAX_HPDCI68'] - temp_results['Z_MIN_HPDCI68'])
+        for key in q_to_compute:
+            results[key][rows] = temp_results[key]
+
+    return results
+
 # def zmode_from_quantiles(quantiles, width=0.005):
 #     """Calculates the mode of the PDF from its quantiles.
 # 
@@ -148,11 +243,50 @@ def zmode_from_quantiles(quantiles, hpdci68=None):
     u = np.argmin(diff)
     return 0.5*(qclipped[u]+qclipped[u+1])
    
+def zmode_from_quantiles_batch(Q, hpdci68=None):
+    """Calculates the mode for a batch of PDFs.
+
+    Vectorized equivalent of `zmode_from_quantiles`: for each PDF, the mode
+    is the center of the narrowest interval between consecutive quantiles
+    among those that overlap with the 68% HPDCI.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+        hpdci68 (tuple[np.ndarray, np.ndarray], optional): The lower and upper
+            bounds of the 68% HPDCI of each PDF, as returned by
+            `HPDCI_from_quantiles_batch`. Computed if not provided.
+
+    Returns:
+        np.ndarray: A 1D array with the modal redshift of each PDF.
+    """
+    if hpdci68 is None:
+        hpdci68 = HPDCI_from_quantiles_batch(Q, conf=0.68)
+
+    Nsources, Nq = Q.shape
+    # find the first and last quantiles inside HPDCI68 (the whole PDF if there are none)
+    inside = (Q >= hpdci68[0][:,None]) & (Q <= hpdci68[1][:,None])
+    any_inside = inside.any(axis=1)
+    first = np.where(any_inside, np.argmax(inside, axis=1), 1)
+    last = np.where(any_inside, Nq-1-np.argmax(inside[:,::-1], axis=1), Nq-2)
+    minq = np.maximum(first-1, 0)
+    maxq = np.minimum(last+2, Nq)
+
+    # narrowest interval among those that overlap with HPDCI68
+    diff = Q[:,1:] - Q[:,:-1]
+    k = np.arange(Nq-1)
+    diff = np.where((k >= minq[:,None]) & (k < maxq[:,None]-1), diff, np.inf)
+    u = np.argmin(diff, axis=1)
+    rows = np.arange(Nsources)
+    return 0.5*(Q[rows,u]+Q[rows,u+1])
+
 def zmedian_from_quantiles(quantiles):
     """Calculates the median redshift from the PDF's quantiles.
 
     The median is the 50th percentile of the distribution, which is found by
     interpolating the quantiles to the cumulative probability value of 0.5.
+    Since the knots are evenly spaced, the interval that contains 0.5 is
+    always the one starting at knot (Nq-1)//2, so no search is needed.
 
     Args:
         quantiles (np.ndarray): A 1D array of monotonic quantile locations.
@@ -160,15 +294,37 @@ def zmedian_from_quantiles(quantiles):
     Returns:
         float: The median redshift (Z_MEDIAN).
     """
-    knots = np.linspace(0, 1, len(quantiles))
-    return np.interp(0.5, knots, quantiles)
+    knots = _knots(len(quantiles))
+    j = (len(quantiles)-1) // 2
+    slope = (quantiles[j+1] - quantiles[j]) / (knots[j+1] - knots[j])
+    return slope*(0.5 - knots[j]) + quantiles[j]
+
+def zmedian_from_quantiles_batch(Q):
+    """Calculates the median redshift for a batch of PDFs.
+
+    Vectorized equivalent of `zmedian_from_quantiles`. Since all the PDFs
+    share the same knots, the interval that contains the cumulative
+    probability 0.5 is the same for all of them.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+
+    Returns:
+        np.ndarray: A 1D array with the median redshift of each PDF.
+    """
+    knots = _knots(Q.shape[1])
+    j = (Q.shape[1]-1) // 2
+    slope = (Q[:,j+1] - Q[:,j]) / (knots[j+1] - knots[j])
+    return slope*(0.5 - knots[j]) + Q[:,j]
 
 def zmean_from_quantiles(quantiles):
     """Calculates the mean redshift from the PDF's quantiles.
 
     The mean is computed by integrating z * P(z) dz. This is equivalent to
     integrating the quantile function (z as a function of cumulative
-    probability F) from F=0 to F=1.
+    probability F) from F=0 to F=1. Since the knots are evenly spaced, the
+    trapezoidal rule reduces to a single sum over the quantiles.
 
     Args:
         quantiles (np.ndarray): A 1D array of monotonic quantile locations.
@@ -176,10 +332,26 @@ def zmean_from_quantiles(quantiles):
     Returns:
         float: The mean redshift (Z_MEAN).
     """
-    knots = np.linspace(0, 1, len(quantiles))
-    return np.trapz(quantiles, knots)
+    Nq = len(quantiles)
+    return (0.5*(quantiles[0]+quantiles[-1]) + quantiles[1:-1].sum()) / (Nq-1)
 
-def zmean_err_from_quantiles(quantiles):
+def zmean_from_quantiles_batch(Q):
+    """Calculates the mean redshift for a batch of PDFs.
+
+    Vectorized equivalent of `zmean_from_quantiles`, integrating the quantile
+    function of all the PDFs at once with the trapezoidal rule.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+
+    Returns:
+        np.ndarray: A 1D array with the mean redshift of each PDF.
+    """
+    Nq = Q.shape[1]
+    return (0.5*(Q[:,0]+Q[:,-1]) + Q[:,1:-1].sum(axis=1)) / (Nq-1)
+
+def zmean_err_from_quantiles(quantiles, zmean=None):
     """Calculates the standard deviation (error) of the mean redshift.
 
     Computes the standard deviation of the PDF, which is the square root of
@@ -187,13 +359,38 @@ def zmean_err_from_quantiles(quantiles):
 
     Args:
         quantiles (np.ndarray): A 1D array of monotonic quantile locations.
+        zmean (float, optional): The mean redshift, as returned by
+            `zmean_from_quantiles`. Computed if not provided.
 
     Returns:
         float: The standard deviation of the redshift distribution.
     """
-    knots = np.linspace(0, 1, len(quantiles))
-    mean = np.trapz(quantiles, knots)
-    ez2 = np.trapz(quantiles**2, knots)
+    Nq = len(quantiles)
+    mean = zmean_from_quantiles(quantiles) if zmean is None else zmean
+    inner = quantiles[1:-1]
+    ez2 = (0.5*(quantiles[0]**2+quantiles[-1]**2) + np.einsum('i,i', inner, inner)) / (Nq-1)
+    variance = ez2 - mean**2
+    return np.sqrt(variance)
+
+def zmean_err_from_quantiles_batch(Q, zmean=None):
+    """Calculates the standard deviation of the redshift for a batch of PDFs.
+
+    Vectorized equivalent of `zmean_err_from_quantiles`.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+        zmean (np.ndarray, optional): The mean redshift of each PDF, as
+            returned by `zmean_from_quantiles_batch`. Computed if not provided.
+
+    Returns:
+        np.ndarray: A 1D array with the standard deviation of each PDF.
+    """
+    Nq = Q.shape[1]
+    mean = zmean_from_quantiles_batch(Q) if zmean is None else zmean
+    # the sum of squares is reduced row by row without building the array of squares
+    inner = Q[:,1:-1]
+    ez2 = (0.5*(Q[:,0]**2+Q[:,-1]**2) + np.einsum('ij,ij->i', inner, inner)) / (Nq-1)
     variance = ez2 - mean**2
     return np.sqrt(variance)
 
@@ -202,7 +399,9 @@ def zrandom_from_quantiles(quantiles):
 
     This uses inverse transform sampling by drawing a uniform random number
     on [0, 1] (representing the cumulative probability) and finding the
-    corresponding redshift by interpolating the quantiles.
+    corresponding redshift by interpolating the quantiles. Since the knots
+    are evenly spaced, the interval that contains the random number is
+    found by arithmetic instead of a search.
 
     Args:
         quantiles (np.ndarray): A 1D array of monotonic quantile locations.
@@ -211,8 +410,36 @@ def zrandom_from_quantiles(quantiles):
         float: A single random redshift draw.
     """
     u = np.random.uniform(0, 1)
-    knots = np.linspace(0, 1, len(quantiles))
-    return np.interp(u, knots, quantiles)
+    pos = u*(len(quantiles)-1)
+    j = min(int(pos), len(quantiles)-2)
+    return quantiles[j] + (pos-j)*(quantiles[j+1] - quantiles[j])
+
+def zrandom_from_quantiles_batch(Q, Nsamples=None):
+    """Draws random redshift values from a batch of PDFs.
+
+    Vectorized equivalent of `zrandom_from_quantiles`. All the uniform
+    random numbers are drawn at once, and since the knots are evenly spaced
+    the interval of the quantile function that contains each of them is
+    found by arithmetic instead of a search.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+        Nsamples (int, optional): The number of random draws per PDF. If None
+            (default), a single value is drawn from each PDF.
+
+    Returns:
+        np.ndarray: A 1D array with one random redshift per PDF, or a 2D array
+            of shape (len(Q), `Nsamples`) if `Nsamples` is given.
+    """
+    Nsources, Nq = Q.shape
+    u = np.random.uniform(0, 1, size=(Nsources, 1 if Nsamples is None else Nsamples))
+    pos = u*(Nq-1)
+    j = np.minimum(pos.astype(np.intp), Nq-2)
+    frac = pos - j
+    q_lo = np.take_along_axis(Q, j, axis=1)
+    z = q_lo + frac*(np.take_along_axis(Q, j+1, axis=1) - q_lo)
+    return z[:,0] if Nsamples is None else z
 
 def odds_from_quantiles(quantiles, zcenter, odds_window=0.03):
     """Calculates the 'odds' parameter for a given redshift.
@@ -229,12 +456,51 @@ def odds_from_quantiles(quantiles, zcenter, odds_window=0.03):
     Returns:
         float: The integrated probability within the defined window.
     """
-    knots = np.linspace(0, 1, len(quantiles))
+    knots = _knots(len(quantiles))
     zbinmin = zcenter - odds_window*(1+zcenter)
     zbinmax = zcenter + odds_window*(1+zcenter)
     qz = np.interp([zbinmin,zbinmax],quantiles,knots,left=0,right=1)
     return qz[1]-qz[0]
 
+def odds_from_quantiles_batch(Q, zcenter, odds_window=0.03):
+    """Calculates the 'odds' parameter for a batch of PDFs.
+
+    Vectorized equivalent of `odds_from_quantiles`, with one central
+    redshift per PDF.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+        zcenter (np.ndarray): A 1D array with the central redshift of each PDF.
+        odds_window (float, optional): The half-width of the integration window
+            as a fraction of (1+z). Defaults to 0.03.
+
+    Returns:
+        np.ndarray: A 1D array with the integrated probability within the
+            window of each PDF.
+    """
+    knots = _knots(Q.shape[1])
+    zbinmin = zcenter - odds_window*(1+zcenter)
+    zbinmax = zcenter + odds_window*(1+zcenter)
+    return _cdf_at(Q, knots, zbinmax) - _cdf_at(Q, knots, zbinmin)
+
+def _cdf_at(Q, knots, z):
+    """Evaluates the CDF of each row of `Q` at the redshift of the same row in `z`.
+
+    Uses the same arithmetic as `np.interp(z, quantiles, knots, left=0, right=1)`.
+    """
+    Nsources, Nq = Q.shape
+    rows = np.arange(Nsources)
+    j = np.sum(Q <= z[:,None], axis=1) - 1 # last quantile <= z
+    jc = np.clip(j, 0, Nq-2)
+    z_lo = Q[rows,jc]
+    z_hi = Q[rows,jc+1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (knots[jc+1] - knots[jc]) / (z_hi - z_lo)
+        F = slope*(z - z_lo) + knots[jc]
+    F = np.where(j < 0, 0.0, np.where(j >= Nq-1, 1.0, F))
+    return F
+
 def HPDCI_from_quantiles(quantiles, conf=0.68, zinside=None):
     """Calculates the Highest Probability Density Credible Interval (HPDCI).
 
@@ -255,16 +521,22 @@ def HPDCI_from_quantiles(quantiles, conf=0.68, zinside=None):
         tuple[float, float]: A tuple containing the lower and upper bounds
             (zmin, zmax) of the calculated credible interval.
     """
-    knots = np.linspace(0, 1, len(quantiles))
-    knot_interval = knots[1]-knots[0]
+    knots = _knots(len(quantiles))
+
+    if zinside is None:
+        grid = _hpdci_grid(len(quantiles), conf)
+        if grid is None:
+            z_center = np.interp(0.5, knots, quantiles)
+            return (z_center, z_center)
+        zmin = _interp_knots(quantiles, grid[0])
+        zmax = _interp_knots(quantiles, grid[1])
+        best = np.argmin(zmax-zmin)
+        return (zmin[best], zmax[best])
 
-    if zinside is not None:
-        qin = np.interp(zinside,quantiles,knots,left=0,right=1)
-        qmin = max([0,qin-conf])
-        qmax = min([1,qin+conf])
-    else:
-        qmin = 0
-        qmax = 1
+    knot_interval = knots[1]-knots[0]
+    qin = np.interp(zinside,quantiles,knots,left=0,right=1)
+    qmin = max([0,qin-conf])
+    qmax = min([1,qin+conf])
 
     start = np.arange(qmin,qmax-conf,0.2*knot_interval)
     end = np.arange(qmin+conf,qmax,0.2*knot_interval)
@@ -277,4 +549,77 @@ def HPDCI_from_quantiles(quantiles, conf=0.68, zinside=None):
     zmax = np.interp(end,knots,quantiles)
     dz = zmax-zmin
     best = np.argmin(dz)
-    return (zmin[best], zmax[best])
\ No newline at end of file
+    return (zmin[best], zmax[best])
+
+def HPDCI_from_quantiles_batch(Q, conf=0.68):
+    """Calculates the HPDCI for a batch of PDFs.
+
+    Vectorized equivalent of `HPDCI_from_quantiles` with `zinside=None`.
+    All PDFs share the same grid of candidate intervals, which is
+    interpolated on every row at once before taking the narrowest one.
+
+    Args:
+        Q (np.ndarray): A 2D array where each row holds the monotonic quantile
+            locations of one PDF. All PDFs must have the same number of quantiles.
+        conf (float, optional): The confidence level (i.e., total probability)
+            the interval should contain. Defaults to 0.68.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Two 1D arrays with the lower and upper
+            bounds (zmin, zmax) of the credible interval of each PDF.
+    """
+    grid = _hpdci_grid(Q.shape[1], conf)
+    if grid is None:
+        z_center = zmedian_from_quantiles_batch(Q)
+        return (z_center, z_center.copy())
+
+    Nsources = Q.shape[0]
+    zlow = np.empty(Nsources)
+    zhigh = np.empty(Nsources)
+    block = max(1, 2**20 // len(grid[0][0])) # bound the size of temporary arrays
+    for first in range(0, Nsources, block):
+        Qb = Q[first:first+block]
+        zmin = _interp_knots(Qb, grid[0])
+        zmax = _interp_knots(Qb, grid[1])
+        best = np.argmin(zmax-zmin, axis=1)
+        rows = np.arange(len(Qb))
+        zlow[first:first+block] = zmin[rows,best]
+        zhigh[first:first+block] = zmax[rows,best]
+    return (zlow, zhigh)
+
+_hpdci_grid_cache = {}
+
+def _hpdci_grid(Nq, conf):
+    """Returns the candidate intervals searched by `HPDCI_from_quantiles`.
+
+    When no `zinside` is given, the cumulative probabilities at the start
+    and end of the candidate intervals only depend on `Nq` and `conf`, so
+    they are computed once and cached as interpolation weights in the knots
+    (see `_interp_knots`). Returns None if there are no candidates.
+    """
+    key = (Nq, conf)
+    if key not in _hpdci_grid_cache:
+        knots = _knots(Nq)
+        knot_interval = knots[1]-knots[0]
+        start = np.arange(0,1-conf,0.2*knot_interval)
+        end = np.arange(conf,1,0.2*knot_interval)
+        if len(start) == 0 or len(end) == 0:
+            _hpdci_grid_cache[key] = None
+        else:
+            _hpdci_grid_cache[key] = (_knots_weights(start, knots), _knots_weights(end, knots))
+    return _hpdci_grid_cache[key]
+
+def _knots_weights(x, knots):
+    """Returns the interval index, offset and width of each `x` in `knots`, as used by `np.interp`."""
+    j = np.clip(np.searchsorted(knots, x, side='right')-1, 0, len(knots)-2)
+    return (j, x-knots[j], knots[j+1]-knots[j])
+
+def _interp_knots(Q, weights):
+    """Interpolates the quantile function(s) in `Q` using precomputed `_knots_weights`.
+
+    Uses the same arithmetic as `np.interp`, and works on the last axis of
+    `Q`, so it can be applied to a single PDF or to a batch of PDFs at once.
+    """
+    j, dx, dk = weights
+    q_lo = Q[...,j]
+    return (Q[...,j+1] - q_lo) / dk * dx + q_lo
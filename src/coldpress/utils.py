@@ -27,7 +27,6 @@ def _monotone_natural_spline(Xout, X, Y):
         raise ImportError("Error: scipy is required for spline interpolation.", file=sys.stderr)
 
     spline = CubicSpline(X, Y, bc_type='natural')
-    pchip = PchipInterpolator(X, Y)
     
     Yout = spline(Xout)
     
@@ -37,11 +36,14 @@ def _monotone_natural_spline(Xout, X, Y):
     idx = np.searchsorted(X, Xout) - 1
     idx = np.clip(idx, 0, len(X)-2)
     
-    for i in range(len(X)-1):
-        mask = (idx == i) & ((dYout < 0) | (Yp[i] <= 0) | (Yp[i+1] <= 0))
-        if np.any(mask):
-            mask = (idx == i)
-            Yout[mask] = pchip(Xout[mask])
+    # flag the intervals where the spline is not monotonic, all at once
+    bad = (Yp[:-1] <= 0) | (Yp[1:] <= 0)
+    bad[idx[dYout < 0]] = True
+    mask = bad[idx]
+    if np.any(mask):
+        # the PCHIP interpolator is only built if some interval needs it
+        pchip = PchipInterpolator(X, Y)
+        Yout[mask] = pchip(Xout[mask])
              
     return Yout
     
@@ -60,18 +62,40 @@ def step_pdf_from_quantiles(quantiles):
             - z_steps_extended (np.ndarray): The x-coordinates (redshift) of the
               step function edges.
             - p_steps_extended (np.ndarray): The y-coordinates (probability
-              density) of the step function.
+              density) of the step function. Steps of zero width (e.g., in
+              delta-like functions) have zero height.
     """
 
     Nq = len(quantiles)
-    # Add a small epsilon to avoid division by zero for delta-like functions
-    dz = quantiles[1:] - quantiles[:-1] + 1e-9
-    p_steps = (1.0 / (Nq - 1)) / dz
-    z_steps = quantiles
-    z_steps_extended = np.concatenate(([z_steps[0]-0.001],z_steps,[z_steps[-1]+0.001]))
-    p_steps_extended = np.concatenate(([0],p_steps,[0]))
+    z_steps_extended = np.empty(Nq+2)
+    z_steps_extended[0] = quantiles[0]-0.001
+    z_steps_extended[1:-1] = quantiles
+    z_steps_extended[-1] = quantiles[-1]+0.001
+
+    # the steps are written in place, leaving zero height where consecutive quantiles coincide
+    dz = np.diff(quantiles)
+    p_steps_extended = np.zeros(Nq+1)
+    np.divide(1.0 / (Nq - 1), dz, out=p_steps_extended[1:-1], where=dz > 0)
     return z_steps_extended, p_steps_extended
     
+# line styles and colors cycled through by the markers of `plot_from_quantiles`
+_MARKER_LINESTYLES = (':', '--', '-.')
+_MARKER_COLORS = tuple(f'C{i}' for i in range(1, 10))
+
+_figure = None
+
+def _saved_figure():
+    """Returns the figure that `plot_from_quantiles` reuses for the plots saved to files.
+
+    The figure is created once, outside of pyplot, so that saving many plots
+    does not create (and destroy) a new figure and its pyplot manager each time.
+    """
+    global _figure
+    if _figure is None:
+        from matplotlib.figure import Figure
+        _figure = Figure(figsize=(8, 6))
+    return _figure
+
 def plot_from_quantiles(quantiles, output_filename=None, interactive=False, markers=None, source_id=None, method='all'):
     """Generates and saves or displays a plot of a single PDF from its quantiles.
 
@@ -98,14 +122,22 @@ def plot_from_quantiles(quantiles, output_filename=None, interactive=False, mark
     """
     
     try:
-        import matplotlib.pyplot as plt
+        import matplotlib
     except ImportError:
         # Re-raise the error so the calling function can handle it.
         raise ImportError("matplotlib is required for plotting.")
         
     from .decode import quantiles_to_binned
     
-    fig, ax = plt.subplots(figsize=(8, 6))
+    if interactive:
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(figsize=(8, 6))
+    else:
+        if output_filename is None:
+            raise ValueError("output_filename must be provided when not in interactive mode.")
+        fig = _saved_figure()
+        fig.clear() # the figure is reused, and a previous call may have failed before saving it
+        ax = fig.add_subplot()
 
     if method == 'steps' or method == 'all':
         z_steps, p_steps = step_pdf_from_quantiles(quantiles)
@@ -116,14 +148,11 @@ def plot_from_quantiles(quantiles, output_filename=None, interactive=False, mark
         spline_line, = ax.plot(zvector, pdf, label='PDF (spline)')
 
     if markers:
-        linestyles = [':', '--', '-.']
-        colors = [f'C{i}' for i in range(1, 10)] 
-
         for i, (name, value) in enumerate(markers.items()):
             if value is not None and np.isfinite(value):
-                style = linestyles[i % len(linestyles)]
-                color = colors[(i+2) % len(colors)]
-                plt.axvline(x=value, linestyle=style, color=color, label=f'{name} = {value:.4f}', alpha=0.9)
+                style = _MARKER_LINESTYLES[i % len(_MARKER_LINESTYLES)]
+                color = _MARKER_COLORS[(i+2) % len(_MARKER_COLORS)]
+                ax.axvline(x=value, linestyle=style, color=color, label=f'{name} = {value:.4f}', alpha=0.9)
 
     ax.set_xlabel('Redshift (z)')
     ax.set_ylabel('Probability Density P(z)')
@@ -157,9 +186,5 @@ def plot_from_quantiles(quantiles, output_filename=None, interactive=False, mark
         plt.tight_layout()
         plt.show()
     else:
-        if output_filename is None:
-            plt.close() # Close the figure to avoid memory leaks
-            raise ValueError("output_filename must be provided when not in interactive mode.")
-        plt.tight_layout()            
-        plt.savefig(output_filename)
-        plt.close()
+        fig.tight_layout()
+        fig.savefig(output_filename)